@@ -1,84 +1,88 @@
-import pandas as pd
-import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from scipy import stats
-from sklearn.ensemble import IsolationForest
-from mpl_toolkits.mplot3d import Axes3D
+from ratio_engine import add_ratios
+from anomaly_scoring import load_or_fit
+from schema import read_merged
+from reporting import Chart, downsample, render_charts
 
-fundamentals_merged = pd.read_csv('merged_fundamentals_securities.csv')
 
-# Calculate Net Margin if not present
-fundamentals_merged['Net Margin'] = fundamentals_merged['Net Income'] / fundamentals_merged['Total Revenue']
+def detect_anomalies(fundamentals_merged, refit=False):
+    # Net Margin, Current Ratio and Debt-to-Equity from the shared ratio engine
+    fundamentals_merged = add_ratios(fundamentals_merged, ['Net Margin', 'Current Ratio', 'Debt-to-Equity'])
 
-# Calculate Debt-to-Equity ratio
-fundamentals_merged['Debt-to-Equity'] = fundamentals_merged['Long-Term Debt'] / fundamentals_merged['Total Equity']
+    # Score rows where all required ratios exist with the persisted Isolation Forest
+    # (fitted and saved on first use)
+    scores = load_or_fit(fundamentals_merged, refit=refit).score(fundamentals_merged)
 
-# Verify Current Ratio exists (it does in your data)
-print("Current Ratio" in fundamentals_merged.columns)  # Should return True
+    # Add results to dataframe
+    fundamentals_merged['Anomaly_Score'] = scores['Anomaly_Score']
+    fundamentals_merged['Is_Anomaly'] = scores['Is_Anomaly']
 
-# Select only rows where all required ratios exist
-X = fundamentals_merged[['Net Margin', 'Current Ratio', 'Debt-to-Equity']].dropna()
+    # Key info about anomalies
+    anomalies = fundamentals_merged[fundamentals_merged['Is_Anomaly'] == -1]
+    anomaly_report = anomalies[[
+        'Ticker Symbol', 
+        'Security',
+        'GICS Sector',
+        'Net Margin',
+        'Current Ratio',
+        'Debt-to-Equity',
+        'Total Revenue'
+    ]].sort_values('Net Margin')
 
-# Proceed with Isolation Forest
-model = IsolationForest(contamination=0.05, random_state=42)
-model.fit(X)
+    return fundamentals_merged, anomaly_report
 
-# Add results to dataframe
-fundamentals_merged.loc[X.index, 'Anomaly_Score'] = model.decision_function(X)
-fundamentals_merged.loc[X.index, 'Is_Anomaly'] = model.predict(X)
 
-# Show top anomalies
-anomalies = fundamentals_merged[fundamentals_merged['Is_Anomaly'] == -1]
-print(f"Found {len(anomalies)} anomalous companies")
+# Visualize anomalies in 3D space
+def plot_anomalies_3d(data):
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
 
+    # Plot normal points (sampled when there are many), then every anomaly
+    normal = downsample(data[data['Is_Anomaly'] == 1])
+    anomalies = data[data['Is_Anomaly'] == -1]
+    ax.scatter(
+        normal['Net Margin'],
+        normal['Current Ratio'],
+        normal['Debt-to-Equity'],
+        c='blue',
+        label='Normal'
+    )
+    ax.scatter(
+        anomalies['Net Margin'],
+        anomalies['Current Ratio'],
+        anomalies['Debt-to-Equity'],
+        c='red',
+        label='Anomaly'
+    )
 
-# Visualize anomalies in 3D space
-fig = plt.figure(figsize=(10, 8))
-ax = fig.add_subplot(111, projection='3d')
-
-# Plot normal points
-normal = fundamentals_merged[fundamentals_merged['Is_Anomaly'] == 1]
-ax.scatter(
-    normal['Net Margin'],
-    normal['Current Ratio'],
-    normal['Debt-to-Equity'],
-    c='blue',
-    label='Normal'
-)
-
-# Plot anomalies
-ax.scatter(
-    anomalies['Net Margin'],
-    anomalies['Current Ratio'],
-    anomalies['Debt-to-Equity'],
-    c='red',
-    label='Anomaly'
-)
-
-ax.set_xlabel('Net Margin')
-ax.set_ylabel('Current Ratio')
-ax.set_zlabel('Debt-to-Equity')
-plt.title('Financial Anomalies in 3D Space')
-plt.legend()
-plt.savefig('financial_anomalies_3d.png')
-plt.show()
-
-# Display key info about anomalies
-anomaly_report = anomalies[[
-    'Ticker Symbol', 
-    'Security',
-    'GICS Sector',
-    'Net Margin',
-    'Current Ratio',
-    'Debt-to-Equity',
-    'Total Revenue'
-]].sort_values('Net Margin')
-
-print(anomaly_report.head(10))
-# Save anomalies to CSV
-anomaly_report.to_csv('financial_anomalies_report.csv', index=False)
-# Save the updated fundamentals data with anomaly scores
-fundamentals_merged.to_csv('fundamentals_with_anomalies.csv', index=False)
-print("Anomaly detection completed and results saved.")
\ No newline at end of file
+    ax.set_xlabel('Net Margin')
+    ax.set_ylabel('Current Ratio')
+    ax.set_zlabel('Debt-to-Equity')
+    plt.title('Financial Anomalies in 3D Space')
+    plt.legend()
+
+
+if __name__ == "__main__":
+    fundamentals_merged = read_merged()
+
+    # Verify Current Ratio exists (it does in your data)
+    print("Current Ratio" in fundamentals_merged.columns)  # Should return True
+
+    fundamentals_merged, anomaly_report = detect_anomalies(fundamentals_merged)
+
+    # Show top anomalies
+    anomalies = fundamentals_merged[fundamentals_merged['Is_Anomaly'] == -1]
+    print(f"Found {len(anomalies)} anomalous companies")
+
+
+    # Visualize anomalies in 3D space
+    render_charts([Chart('financial_anomalies_3d.png', plot_anomalies_3d, fundamentals_merged[
+        ['Net Margin', 'Current Ratio', 'Debt-to-Equity', 'Is_Anomaly']])])
+
+    # Display key info about anomalies
+    print(anomaly_report.head(10))
+    # Save anomalies to CSV
+    anomaly_report.to_csv('financial_anomalies_report.csv', index=False)
+    # Save the updated fundamentals data with anomaly scores
+    fundamentals_merged.to_csv('fundamentals_with_anomalies.csv', index=False)
+    print("Anomaly detection completed and results saved.")
@@ -0,0 +1,144 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+
+from ratio_engine import compute_ratios
+from instrumentation import stage
+from schema import read_merged
+
+FEATURES = ['Net Margin', 'Current Ratio', 'Debt-to-Equity']
+MODEL_DIR = os.path.join('.cache', 'models')
+MODEL_PATH = os.path.join(MODEL_DIR, 'isolation_forest.joblib')
+BATCH_SIZE = 50_000
+# Bumped whenever the way features are derived changes, so models persisted
+# by older code are refitted
+FEATURE_VERSION = 2
+
+
+def _fit_one(X, params):
+    model = IsolationForest(**params)
+    model.fit(X)
+    return model
+
+
+def _score_batch(model, X):
+    return model.decision_function(X)
+
+
+# IsolationForest scorer that is fitted once, persisted together with its
+# feature schema, and reused to score new fundamentals rows in batches.
+# With by='GICS Sector' one model is fitted (and scored) per sector in parallel.
+class AnomalyScorer:
+    def __init__(self, features=FEATURES, contamination=0.05, random_state=42, n_jobs=-1, by=None):
+        self.features = list(features)
+        self.params = {'contamination': contamination, 'random_state': random_state}
+        self.n_jobs = n_jobs
+        self.by = by
+        self.models = {}
+
+    # The features come from the shared ratio engine, except those the
+    # fundamentals carry themselves (the reported 'Current Ratio')
+    def _feature_frame(self, df):
+        X = compute_ratios(df, self.features, keep_existing=True)
+        return X[np.isfinite(X.to_numpy()).all(axis=1)]
+
+    def _groups(self, df, X):
+        if self.by is None:
+            return {None: X}
+        keys = df.loc[X.index, self.by].astype(str)
+        return {key: X[keys == key] for key in keys.unique()}
+
+    def fit(self, df):
+        with stage("isolation_forest_fit", rows_in=len(df)):
+            groups = self._groups(df, self._feature_frame(df))
+            names = [key for key, X in groups.items() if len(X)]
+            models = Parallel(n_jobs=self.n_jobs)(delayed(_fit_one)(groups[key], self.params) for key in names)
+            self.models = dict(zip(names, models))
+        return self
+
+    # Anomaly_Score is the decision function (negative = anomalous) and
+    # Is_Anomaly is -1/1 like IsolationForest.predict; rows with missing
+    # features or an unseen group are left as NaN
+    def score(self, df, batch_size=BATCH_SIZE):
+        if not self.models:
+            raise ValueError("AnomalyScorer has not been fitted")
+        with stage("isolation_forest_score", rows_in=len(df)) as record:
+            result = self._score(df, batch_size)
+            record.rows_out = int(result['Anomaly_Score'].notna().sum())
+        return result
+
+    def _score(self, df, batch_size):
+        X = self._feature_frame(df)
+        tasks, index = [], []
+        for key, group in self._groups(df, X).items():
+            model = self.models.get(key)
+            if model is None:
+                continue
+            for start in range(0, len(group), batch_size):
+                batch = group.iloc[start:start + batch_size]
+                tasks.append(delayed(_score_batch)(model, batch))
+                index.append(batch.index)
+        scores = Parallel(n_jobs=self.n_jobs, prefer='threads')(tasks)
+
+        result = pd.DataFrame(np.nan, index=df.index, columns=['Anomaly_Score', 'Is_Anomaly'])
+        for idx, values in zip(index, scores):
+            result.loc[idx, 'Anomaly_Score'] = values
+            result.loc[idx, 'Is_Anomaly'] = np.where(values < 0, -1, 1)
+        return result
+
+    def save(self, path=MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        state = {
+            'features': self.features,
+            'params': self.params,
+            'by': self.by,
+            'feature_version': FEATURE_VERSION,
+            'models': self.models,
+            'sklearn_version': sklearn.__version__,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, n_jobs=-1):
+        state = joblib.load(path)
+        scorer = cls(state['features'], n_jobs=n_jobs, by=state['by'], **state['params'])
+        scorer.models = state['models']
+        scorer.feature_version = state.get('feature_version')
+        return scorer
+
+
+# Reuse the persisted model when it was fitted on the same feature schema,
+# otherwise fit a new one and persist it
+def load_or_fit(df, path=MODEL_PATH, features=FEATURES, by=None, refit=False, **kwargs):
+    if not refit and os.path.exists(path):
+        scorer = AnomalyScorer.load(path)
+        if scorer.features == list(features) and scorer.by == by and scorer.feature_version == FEATURE_VERSION:
+            return scorer
+    scorer = AnomalyScorer(features, by=by, **kwargs).fit(df)
+    scorer.save(path)
+    return scorer
+
+
+if __name__ == "__main__":
+    import time
+
+    fundamentals_merged = read_merged()
+
+    start = time.perf_counter()
+    scorer = load_or_fit(fundamentals_merged, refit=True)
+    fitted = time.perf_counter()
+    scores = AnomalyScorer.load().score(fundamentals_merged)
+    scored = time.perf_counter()
+    print(f"Fit + save: {fitted - start:.3f}s, load + score: {scored - fitted:.3f}s")
+    print(f"Found {(scores['Is_Anomaly'] == -1).sum()} anomalous rows")
+
+    sector_path = os.path.join(MODEL_DIR, 'isolation_forest_by_sector.joblib')
+    sector_scores = load_or_fit(fundamentals_merged, path=sector_path, by='GICS Sector', refit=True).score(fundamentals_merged)
+    print(f"Found {(sector_scores['Is_Anomaly'] == -1).sum()} anomalous rows when scored per sector")
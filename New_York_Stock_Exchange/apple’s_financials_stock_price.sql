@@ -6,6 +6,13 @@ FROM
 JOIN 
     prices p 
     ON f.[Ticker Symbol] = p.symbol 
-   AND f.[Period Ending] = p.date
+   -- last trading day at or before the period end, at most a week earlier
+   AND p.date = (
+        SELECT MAX(p2.date)
+        FROM prices p2
+        WHERE p2.symbol = f.[Ticker Symbol]
+          AND p2.date <= f.[Period Ending]
+          AND p2.date >= date(f.[Period Ending], '-7 days')
+   )
 WHERE 
     f.[Ticker Symbol] = 'AAPL';
\ No newline at end of file
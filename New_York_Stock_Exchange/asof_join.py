@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+
+# Days since epoch are shifted into the positive range before being packed
+# into the low 32 bits of the (ticker, date) key
+_DAY_OFFSET = 1 << 31
+
+
+def _to_days(dates):
+    days = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[D]")
+    missing = np.isnat(days)
+    return np.where(missing, 0, days.astype(np.int64)), missing
+
+
+# Sorted lookup structure over a price table. Rows are ordered by (ticker, date)
+# once, so each ticker owns a contiguous block of ascending dates and a single
+# binary search over the packed keys lands inside the right block.
+class AsofIndex:
+    def __init__(self, prices, ticker_col='symbol', date_col='date'):
+        # Factorize plain values, not a categorical: that would be ordered by
+        # its categories, while lookup() relies on lexicographic order
+        codes, tickers = pd.factorize(np.asarray(prices[ticker_col], dtype=object), sort=True)
+        self.tickers = np.asarray(tickers.astype(str), dtype=object)
+        days, missing = _to_days(prices[date_col])
+
+        keys = (codes.astype(np.int64) << 32) | (days + _DAY_OFFSET)
+        keep = np.flatnonzero(~missing)
+        order = keep[np.argsort(keys[keep], kind='stable')]
+        self.keys = keys[order]
+        self.rows = order
+        self.prices = prices
+
+    # Position (into the price table) of the last row at or before each
+    # (ticker, date) pair, or -1 when there is none within `tolerance`
+    def lookup(self, tickers, dates, tolerance=None):
+        tickers = np.asarray(pd.Series(tickers).astype(str))
+        days, missing = _to_days(dates)
+
+        codes = np.searchsorted(self.tickers, tickers)
+        known = codes < len(self.tickers)
+        known[known] = self.tickers[codes[known]] == tickers[known]
+
+        query = (codes.astype(np.int64) << 32) | (days + _DAY_OFFSET)
+        pos = np.searchsorted(self.keys, query, side='right') - 1
+        found = known & ~missing & (pos >= 0)
+
+        matched = self.keys[np.where(found, pos, 0)]
+        found &= (matched >> 32) == codes
+        if tolerance is not None:
+            max_days = pd.Timedelta(tolerance) // pd.Timedelta(days=1)
+            found &= (days + _DAY_OFFSET) - (matched & 0xFFFFFFFF) <= max_days
+        return np.where(found, self.rows[np.where(found, pos, 0)], -1)
+
+
+# Left as-of join: each left row gets the last right row for the same ticker
+# dated at or before its own date (optionally no older than `tolerance`)
+@instrument("price merge")
+def asof_join(left, right, left_on=('Ticker Symbol', 'Period Ending'),
+              right_on=('symbol', 'date'), tolerance=None, columns=None, index=None):
+    if index is None:
+        index = AsofIndex(right, *right_on)
+    rows = index.lookup(left[left_on[0]], left[left_on[1]], tolerance)
+
+    # Unmatched rows (-1) come back as NaN/NaT, like a left merge
+    columns = list(right.columns) if columns is None else list(columns)
+    taken = right[columns].reset_index(drop=True).reindex(rows)
+    result = left.copy()
+    for col in columns:
+        result[col] = taken[col].array
+    return result
+
+
+if __name__ == "__main__":
+    import time
+    from csv_cache import read_table
+
+    fundamentals = read_table("fundamentals", columns=['Ticker Symbol', 'Period Ending'])
+    prices = read_table("price_split", columns=['date', 'symbol', 'close'])
+
+    start = time.perf_counter()
+    index = AsofIndex(prices)
+    built = time.perf_counter()
+    joined = asof_join(fundamentals, prices, tolerance='7D', index=index)
+    done = time.perf_counter()
+
+    print(f"Index build: {built - start:.3f}s for {len(prices):,} price rows")
+    print(f"As-of lookup: {done - built:.3f}s for {len(fundamentals):,} periods")
+    print(f"Matched {joined['close'].notna().sum():,} of {len(joined):,} periods")
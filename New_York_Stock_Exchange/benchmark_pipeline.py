@@ -0,0 +1,210 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import peak_rss_mb, reset_peak_rss
+
+DATA_DIR = os.path.join(".cache", "benchmark")
+OUTPUT_PATH = "benchmark_results.csv"
+SCALES = (1, 10)
+NOISE = 0.05
+
+
+# Synthetic data: every ticker is copied `scale` times. Copy 0 keeps the
+# original symbol (so the AAPL query still matches); copy k gets the
+# suffix '.k' and its numbers are scaled by a random factor around 1.
+def _suffix(tickers, k):
+    return tickers if k == 0 else tickers.astype(str) + f".{k}"
+
+
+def _scale_frame(df, k, rng, skip=()):
+    if k == 0:
+        return df
+    df = df.copy()
+    factor = rng.lognormal(0.0, NOISE)
+    for col in df.select_dtypes('number').columns:
+        if col not in skip:
+            df[col] = df[col] * factor
+    return df
+
+
+SOURCE_FILES = ("fundamentals.csv", "securities.csv", "prices.csv", "prices-split-adjusted.csv")
+
+
+def make_synthetic(scale, out_dir, source_dir=".", seed=42):
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    fundamentals = pd.read_csv(os.path.join(source_dir, "fundamentals.csv"))
+    securities = pd.read_csv(os.path.join(source_dir, "securities.csv"), dtype={"CIK": str})
+    copies_f, copies_s = [], []
+    for k in range(scale):
+        f = _scale_frame(fundamentals, k, rng, skip=("Unnamed: 0", "For Year"))
+        f["Ticker Symbol"] = _suffix(fundamentals["Ticker Symbol"], k)
+        copies_f.append(f)
+        s = securities.copy()
+        s["Ticker symbol"] = _suffix(securities["Ticker symbol"], k)
+        copies_s.append(s)
+    fundamentals = pd.concat(copies_f, ignore_index=True)
+    fundamentals["Unnamed: 0"] = np.arange(len(fundamentals))
+    fundamentals.to_csv(os.path.join(out_dir, "fundamentals.csv"), index=False)
+    pd.concat(copies_s, ignore_index=True).to_csv(os.path.join(out_dir, "securities.csv"), index=False)
+
+    # The price tables are written one copy at a time to bound memory
+    for name in ("prices.csv", "prices-split-adjusted.csv"):
+        prices = pd.read_csv(os.path.join(source_dir, name))
+        path = os.path.join(out_dir, name)
+        for k in range(scale):
+            p = _scale_frame(prices, k, rng, skip=("volume",))
+            p["symbol"] = _suffix(prices["symbol"], k)
+            p.to_csv(path, index=False, mode="w" if k == 0 else "a", header=k == 0)
+
+
+# Stages: setup() prepares inputs outside the timed region before every
+# repeat, run(ctx) is the measured work. Each stage runs in a fresh process.
+def _no_setup():
+    return None
+
+
+def _load_cold_setup():
+    shutil.rmtree(os.path.join(".cache", "tables"), ignore_errors=True)
+
+
+def _load_all(_):
+    import load_data as ld
+    ld._loaded.clear()
+    return {name: len(ld.load(name)) for name in ("fundamentals", "securities", "prices", "price_split")}
+
+
+def _raw_tables():
+    from csv_cache import read_table
+    return read_table("fundamentals"), read_table("securities")
+
+
+def _merge(tables):
+    from mearged_fundamentals_securities import merge_fundamentals_securities
+    return merge_fundamentals_securities(*tables)
+
+
+def _merged():
+    return _merge(_raw_tables())
+
+
+def _ratios(df):
+    from ratio_engine import compute_ratios
+    return compute_ratios(df)
+
+
+def _forest_fit(df):
+    from anomaly_scoring import AnomalyScorer
+    return AnomalyScorer().fit(df)
+
+
+def _forest_score_setup():
+    df = _merged()
+    return df, _forest_fit(df)
+
+
+def _forest_score(ctx):
+    df, scorer = ctx
+    return scorer.score(df)
+
+
+def _store(_):
+    import store_in_sql_database as store
+    store.store_tables()
+
+
+def _query(sql):
+    import store_in_sql_database as store
+    conn = sqlite3.connect(store.DB_PATH)
+    try:
+        return pd.read_sql(sql, conn)
+    finally:
+        conn.close()
+
+
+def _query_apple(_):
+    from test_the_queries import query_apple
+    return _query(query_apple)
+
+
+def _query_sector(_):
+    from test_the_queries import query_sector
+    return _query(query_sector)
+
+
+# Order matters: the cold load builds the Parquet caches and the SQL store
+# builds the database the query stages read
+STAGES = {
+    "load_data (cold cache)": (_load_cold_setup, _load_all),
+    "load_data (warm cache)": (_no_setup, _load_all),
+    "merge fundamentals+securities": (_raw_tables, _merge),
+    "ratios": (_merged, _ratios),
+    "isolation_forest_fit": (_merged, _forest_fit),
+    "isolation_forest_score": (_forest_score_setup, _forest_score),
+    "sql store": (_no_setup, _store),
+    "query company+price": (_no_setup, _query_apple),
+    "query sector": (_no_setup, _query_sector),
+}
+
+
+# Runs in a fresh worker process, so the peak RSS belongs to this stage
+# alone; it is reset after setup so it covers the timed work only
+def _run_stage(name, data_dir, repeats):
+    os.chdir(data_dir)
+    setup, run = STAGES[name]
+    timings, peaks = [], []
+    for _ in range(repeats):
+        ctx = setup()
+        reset_peak_rss()
+        start = time.perf_counter()
+        run(ctx)
+        timings.append(time.perf_counter() - start)
+        peaks.append(peak_rss_mb())
+    peaks = [p for p in peaks if p is not None]
+    return {"seconds": min(timings), "peak_rss_mb": max(peaks) if peaks else None}
+
+
+# Synthetic data is generated once per scale and reused on later runs
+def run_benchmarks(scales=SCALES, stages=None, data_dir=DATA_DIR, repeats=1, source_dir=".", regenerate=False):
+    stages = list(STAGES) if stages is None else list(stages)
+    rows = []
+    for scale in scales:
+        scale_dir = os.path.abspath(os.path.join(data_dir, f"x{scale}"))
+        if regenerate or not all(os.path.exists(os.path.join(scale_dir, f)) for f in SOURCE_FILES):
+            start = time.perf_counter()
+            make_synthetic(scale, scale_dir, source_dir)
+            print(f"x{scale}: synthetic data written to {scale_dir} in {time.perf_counter() - start:.1f}s")
+
+        for name in stages:
+            # max_tasks_per_child=1 gives every stage a clean (spawned) process
+            with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+                result = pool.submit(_run_stage, name, scale_dir, repeats).result()
+            rows.append({"scale": scale, "stage": name, **result})
+            peak = "n/a" if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}"
+            print(f"x{scale} {name:<32} {result['seconds']:8.3f}s  peak RSS {peak:>8} MB")
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the analytics pipeline stages on scaled synthetic data")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES),
+                        help="data size multiples, e.g. 1 10 100 (100x writes ~9 GB of prices)")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=None)
+    parser.add_argument("--repeats", type=int, default=1, help="timed runs per stage; the fastest is kept")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--regenerate", action="store_true", help="rewrite the synthetic data")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.stages, args.data_dir, args.repeats, regenerate=args.regenerate)
+    results.to_csv(args.output, index=False)
+    print(results.pivot(index="stage", columns="scale", values="seconds").reindex(results["stage"].unique()).round(3))
+    print(f"Results saved to '{args.output}'")
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+import store_in_sql_database as store
+from test_the_queries import query_apple, query_sector
+
+NAIVE_DB = "nyse_finance_naive.db"
+TUNED_DB = "nyse_finance_tuned.db"
+REPEATS = 5
+
+
+# The original loader: default to_sql inserts, no keys, no indexes
+def build_naive(db_path):
+    tables = store.prepare_tables()
+    conn = sqlite3.connect(db_path)
+    for name, df in tables.items():
+        df.to_sql(name, conn, if_exists="replace", index=False)
+    conn.close()
+
+
+def build_tuned(db_path):
+    store.store_tables(db_path)
+
+
+def _remove(db_path):
+    for suffix in ("", "-wal", "-shm", "-generation"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def time_queries(db_path, repeats=REPEATS):
+    conn = sqlite3.connect(db_path)
+    timings = {}
+    for name, sql in (("company financials + price", query_apple), ("sector revenue", query_sector)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            pd.read_sql(sql, conn)
+        timings[name] = (time.perf_counter() - start) / repeats
+    conn.close()
+    return timings
+
+
+if __name__ == "__main__":
+    rows = []
+    for label, db_path, build in (("before", NAIVE_DB, build_naive), ("after", TUNED_DB, build_tuned)):
+        _remove(db_path)
+        start = time.perf_counter()
+        build(db_path)
+        load_seconds = time.perf_counter() - start
+        rows.append({"store": label, "step": "load", "seconds": load_seconds})
+        for query, seconds in time_queries(db_path).items():
+            rows.append({"store": label, "step": query, "seconds": seconds})
+        _remove(db_path)
+
+    results = pd.DataFrame(rows).pivot(index="step", columns="store", values="seconds")[["before", "after"]]
+    results["speedup"] = results["before"] / results["after"]
+    print(results.round(4))
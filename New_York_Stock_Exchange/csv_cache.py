@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from instrumentation import stage
+
+# Parquet needs pyarrow; without it we fall back to reading the CSVs directly
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CACHE_DIR = os.path.join(".cache", "tables")
+# Rows per chunk when streaming a source CSV
+CHUNK_ROWS = 250_000
+# Version of the cached file layout; 2 keeps the price columns at float64
+CACHE_FORMAT = 2
+
+# Explicit dtypes for every source table.
+# Fundamentals stay float64: values reach 1e11 and float32 would lose precision.
+# Prices are cached as float64 exactly as in the CSV; the float32 columns are
+# only narrowed when read for analytics, and read with exact=True for the
+# SQLite store and CSV exports.
+TABLES = {
+    "fundamentals": {
+        "path": "fundamentals.csv",
+        "ticker": "Ticker Symbol",
+        "date": "Period Ending",
+        "categorical": ["Ticker Symbol"],
+        "dates": ["Period Ending"],
+        "float32": [],
+    },
+    "prices": {
+        "path": "prices.csv",
+        "ticker": "symbol",
+        "date": "date",
+        "categorical": ["symbol"],
+        "dates": ["date"],
+        "float32": ["open", "close", "low", "high"],
+    },
+    "price_split": {
+        "path": "prices-split-adjusted.csv",
+        "ticker": "symbol",
+        "date": "date",
+        "categorical": ["symbol"],
+        "dates": ["date"],
+        "float32": ["open", "close", "low", "high"],
+    },
+    "securities": {
+        "path": "securities.csv",
+        "ticker": "Ticker symbol",
+        "date": None,
+        "categorical": ["Ticker symbol", "SEC filings", "GICS Sector", "GICS Sub Industry"],
+        "dates": [],
+        "float32": [],
+    },
+}
+
+
+def _apply_dtypes(df, spec, exact=False):
+    for col in spec["categorical"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in spec["dates"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    if not exact:
+        _narrow(df, spec)
+    return df
+
+
+def _narrow(df, spec):
+    for col in spec["float32"]:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def _read_source(spec, columns=None, exact=False):
+    with stage(f"parse {os.path.basename(spec['path'])}") as record:
+        df = _apply_dtypes(pd.read_csv(spec["path"], usecols=columns), spec, exact)
+        record.rows_out = len(df)
+    return df
+
+
+# Read a CSV laid out like one of the source tables (e.g. a daily delta
+# file) with that table's dtypes, bypassing the cache
+def read_like(name, path, columns=None, exact=False):
+    return _read_source(dict(TABLES[name], path=path), columns, exact)
+
+
+# Streaming pipeline: each stage is a generator over DataFrame chunks, so at
+# most one raw chunk of the CSV is held in memory at a time.
+def _csv_chunks(path, chunksize, usecols=None):
+    yield from pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+
+
+def _keep_tickers(chunks, ticker_col, tickers):
+    tickers = set(tickers)
+    for chunk in chunks:
+        yield chunk[chunk[ticker_col].isin(tickers)]
+
+
+# Dates and float32 columns are converted per chunk. Categoricals are left as
+# strings here since every chunk would get its own categories; concat_chunks
+# converts them once the chunks are combined.
+def _convert_chunks(chunks, spec, exact=False):
+    spec = dict(spec, categorical=[])
+    for chunk in chunks:
+        yield _apply_dtypes(chunk.copy(), spec, exact)
+
+
+def _keep_dates(chunks, date_col, start=None, end=None):
+    for chunk in chunks:
+        if start is not None:
+            chunk = chunk[chunk[date_col] >= pd.Timestamp(start)]
+        if end is not None:
+            chunk = chunk[chunk[date_col] <= pd.Timestamp(end)]
+        yield chunk
+
+
+# Stream a source table from its CSV in chunks of `chunksize` rows, with the
+# ticker filter applied before any parsing and the date filter after it.
+# Empty chunks are skipped. Unlike read_table this never materializes the
+# whole file, so peak memory is bounded by the chunk size.
+def stream_table(name, chunksize=CHUNK_ROWS, columns=None, tickers=None, start=None, end=None, path=None,
+                 exact=False):
+    if name not in TABLES:
+        raise ValueError(f"Unknown table '{name}'. Expected one of: {', '.join(TABLES)}")
+
+    spec = TABLES[name]
+    if (start is not None or end is not None) and spec["date"] is None:
+        raise ValueError(f"Table '{spec['path']}' has no date column to filter on")
+    usecols = None
+    if columns is not None:
+        filter_cols = [spec["ticker"]] if tickers is not None else []
+        filter_cols += [spec["date"]] if start is not None or end is not None else []
+        usecols = list(dict.fromkeys(list(columns) + filter_cols))
+
+    chunks = _csv_chunks(path or spec["path"], chunksize, usecols)
+    if tickers is not None:
+        chunks = _keep_tickers(chunks, spec["ticker"], tickers)
+    chunks = _convert_chunks(chunks, spec, exact)
+    if start is not None or end is not None:
+        chunks = _keep_dates(chunks, spec["date"], start, end)
+    for chunk in chunks:
+        if len(chunk):
+            yield chunk if columns is None else chunk[list(columns)]
+
+
+# Zero-row frame with the columns and dtypes the chunks of stream_table
+# have; other columns take the types pandas infers from the first rows
+def table_schema(name, path=None, sample_rows=1_000, exact=False):
+    spec = TABLES[name]
+    sample = pd.read_csv(path or spec["path"], nrows=sample_rows)
+    return next(_convert_chunks([sample], spec, exact)).head(0)
+
+
+# Combine streamed chunks into one frame with the table's dtypes
+def concat_chunks(chunks, name):
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks, ignore_index=True)
+    for col in TABLES[name]["categorical"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+# Translate ticker/date restrictions into Parquet row filters
+def _build_filters(spec, tickers=None, start=None, end=None):
+    filters = []
+    if tickers is not None:
+        filters.append((spec["ticker"], "in", list(tickers)))
+    if (start is not None or end is not None) and spec["date"] is None:
+        raise ValueError(f"Table '{spec['path']}' has no date column to filter on")
+    if start is not None:
+        filters.append((spec["date"], ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append((spec["date"], "<=", pd.Timestamp(end)))
+    return filters or None
+
+
+# Same restrictions applied in memory, for freshly built or uncached tables
+def _apply_filters(df, filters, columns=None):
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        for col, op, value in filters:
+            if op == "in":
+                mask &= df[col].isin(value)
+            elif op == ">=":
+                mask &= df[col] >= value
+            else:
+                mask &= df[col] <= value
+        df = df[mask].reset_index(drop=True)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+# The cache key changes whenever the source file, its dtype spec or the
+# cache layout (CACHE_FORMAT) changes
+def _cache_key(spec):
+    st = os.stat(spec["path"])
+    payload = json.dumps([st.st_mtime_ns, st.st_size, spec, CACHE_FORMAT], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def cache_path(name):
+    spec = TABLES[name]
+    return os.path.join(CACHE_DIR, f"{name}-{_cache_key(spec)}.parquet")
+
+
+def _build_cache(name, path):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df = _read_source(TABLES[name], exact=True)
+
+    # Write atomically, then drop cache files left over from older sources
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    for fname in os.listdir(CACHE_DIR):
+        stale = os.path.join(CACHE_DIR, fname)
+        if fname.startswith(f"{name}-") and fname.endswith(".parquet") and stale != path:
+            os.remove(stale)
+    return df
+
+
+# Load a source table from its typed Parquet cache, building it on first use.
+# Pass `columns` to read only the columns a script actually needs, and
+# `tickers`/`start`/`end` to push a row filter down into the Parquet read.
+# With exact=True the price columns keep the CSV's float64 values.
+def read_table(name, columns=None, tickers=None, start=None, end=None, exact=False):
+    if name not in TABLES:
+        raise ValueError(f"Unknown table '{name}'. Expected one of: {', '.join(TABLES)}")
+
+    spec = TABLES[name]
+    filters = _build_filters(spec, tickers, start, end)
+    if not HAS_PYARROW:
+        # The filter columns must be read even when they are not projected
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + [f[0] for f in filters or []]))
+        return _apply_filters(_read_source(spec, usecols, exact), filters, columns)
+
+    path = cache_path(name)
+    if not os.path.exists(path):
+        df = _build_cache(name, path)
+        df = df if filters is None and columns is None else _apply_filters(df, filters, columns).copy()
+    else:
+        df = pd.read_parquet(path, columns=columns, filters=filters)
+    return df if exact else _narrow(df, spec)
+
+
+if __name__ == "__main__":
+    # Warm the cache for every table
+    for table_name in TABLES:
+        if os.path.exists(TABLES[table_name]["path"]):
+            table = read_table(table_name)
+            print(f"{table_name}: {table.shape} -> {cache_path(table_name)}")
+        else:
+            print(f"{table_name}: source '{TABLES[table_name]['path']}' not found, skipped")
@@ -1,5 +1,7 @@
 import pandas as pd
 import load_data as ld
+from csv_cache import read_table
+from securities_dimension import securities_dimension
 
 # Clean fundamentals Table
 fundamentals = ld.fundamentals.rename(columns={'Unnamed: 0': 'id'})
@@ -8,17 +10,13 @@ fundamentals.dropna(subset=['Net Income', 'Total Revenue'], inplace=True)
 # FIX: Use pd.to_datetime instead of ld.to_datetime
 fundamentals['Period Ending'] = pd.to_datetime(fundamentals['Period Ending'], errors='coerce')
 
-# Clean securities Table
-ld.securities['Ticker symbol'] = ld.securities['Ticker symbol'].str.upper()
-securities = ld.securities[['Ticker symbol', 'Security', 'GICS Sector', 'GICS Sub Industry']].copy()
+# Clean securities Table (ticker symbols are upper-cased by the dimension)
+securities = securities_dimension().frame(['Security', 'GICS Sector', 'GICS Sub Industry'])
 
 # Clean prices-split-adjusted Table
-# FIX: Column name should be 'date' not 'Date' (as per your dataset description)
-ld.price_split['date'] = pd.to_datetime(ld.price_split['date'], errors='coerce')
-
-# Filter for relevant tickers
+# Only the relevant tickers are read, filtered inside the cached table read
 valid_tickers = fundamentals['Ticker Symbol'].unique()
-price_split = ld.price_split[ld.price_split['symbol'].isin(valid_tickers)].copy()
+price_split = read_table('price_split', tickers=valid_tickers)
 
 # Print success message
 print("Data cleaning completed successfully!")
@@ -0,0 +1,158 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from csv_cache import HAS_PYARROW, TABLES, cache_path, read_table
+from query_cache import read_sql as read_sqlite
+from securities_dimension import securities_dimension
+from store_in_sql_database import DB_PATH
+
+# DuckDB is optional; without it every query goes to SQLite
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+BACKENDS = ("sqlite", "duckdb")
+# Backend used when a caller does not pick one
+BACKEND_ENV = "NYSE_SQL_BACKEND"
+DEFAULT_BACKEND = os.environ.get(BACKEND_ENV, "sqlite")
+REPEATS = 5
+
+# The SQL tables as views over the source tables, shaped like the SQLite
+# store: securities is the ticker dimension (tickers normalized, first row
+# per ticker), and fundamentals carries the securities columns with its row
+# number renamed to id
+VIEWS = {
+    "securities": 'SELECT * FROM {securities}',
+    "fundamentals": (
+        'SELECT f.* RENAME ("Unnamed: 0" AS id), s.* EXCLUDE ("Ticker symbol") '
+        'FROM {fundamentals} f LEFT JOIN securities s ON upper(trim(f."Ticker Symbol")) = s."Ticker symbol"'
+    ),
+    "prices": "SELECT * FROM {price_split}",
+}
+
+# String literals are left alone; everything else is translated
+_LITERALS = re.compile(r"('(?:[^']|'')*')")
+# SQLite date modifiers such as date(x, '-7 days')
+_DATE_SHIFT = re.compile(r"date\(([^,()]+),\s*'([+-]?\d+) days?'\)", re.I)
+
+
+def _translate_code(code):
+    code = re.sub(r"\[([^\]]*)\]", lambda m: '"' + m.group(1).replace('"', '""') + '"', code)
+    return re.sub(r"(?<![:\w]):([A-Za-z_]\w*)", r"$\1", code)
+
+
+# Rewrite SQLite-flavoured SQL for DuckDB: [bracketed] identifiers become
+# "quoted" ones, :name parameters become $name and date(x, '<n> days')
+# becomes date arithmetic. Literals are never touched.
+def translate_sql(sql):
+    sql = _DATE_SHIFT.sub(lambda m: f"(CAST({m.group(1).strip()} AS DATE) + INTERVAL '{m.group(2)} days')", sql)
+    parts = _LITERALS.split(sql)
+    return "".join(part if i % 2 else _translate_code(part) for i, part in enumerate(parts))
+
+
+# The source a view reads: the typed Parquet cache when pyarrow is
+# available (built on first use), otherwise the CSV itself
+def _source(name):
+    if HAS_PYARROW:
+        path = cache_path(name)
+        if not os.path.exists(path):
+            read_table(name)
+        return f"read_parquet('{path}')"
+    return f"read_csv('{TABLES[name]['path']}', header = true)"
+
+
+# In-process DuckDB database with one view per SQL table over the sources
+def connect(threads=None):
+    if not HAS_DUCKDB:
+        raise ImportError("duckdb is not installed; use the sqlite backend or `pip install duckdb`")
+    conn = duckdb.connect()
+    if threads:
+        conn.execute(f"SET threads = {int(threads)}")
+    # The same deduplicated dimension the SQLite store is loaded from
+    dimension = securities_dimension().frame()
+    conn.register("securities_dimension", dimension.astype({c: object for c in dimension.select_dtypes("category")}))
+    sources = {name: _source(name) for name in ("fundamentals", "price_split")}
+    sources["securities"] = "securities_dimension"
+    for view, select in VIEWS.items():
+        conn.execute(f'CREATE VIEW "{view}" AS ' + select.format(**sources))
+    return conn
+
+
+_default_conn = None
+
+
+def read_sql_duckdb(sql, params=None, conn=None):
+    global _default_conn
+    if conn is None:
+        if _default_conn is None:
+            _default_conn = connect()
+        conn = _default_conn
+    return conn.execute(translate_sql(sql), params or {}).df()
+
+
+# Run a query on either backend. SQLite results come through the
+# generation-keyed query cache; DuckDB scans the sources directly.
+def read_sql(sql, params=None, backend=None, db_path=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend == "duckdb":
+        return read_sql_duckdb(sql, params)
+    if backend == "sqlite":
+        return read_sqlite(sql, params, db_path or DB_PATH)
+    raise ValueError(f"Unknown backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
+
+
+def _best_time(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+# Side-by-side timings of the queries, bypassing the result cache: SQLite
+# on a read-only connection to the store, DuckDB over the source tables
+def compare_backends(queries, db_path=None, repeats=REPEATS):
+    uri = Path(db_path or DB_PATH).resolve().as_uri() + "?mode=ro"
+    sqlite_conn = sqlite3.connect(uri, uri=True)
+    duck_conn = connect()
+    rows = []
+    try:
+        for name, sql in queries.items():
+            sqlite_seconds, sqlite_result = _best_time(lambda: pd.read_sql(sql, sqlite_conn), repeats)
+            duck_seconds, duck_result = _best_time(lambda: read_sql_duckdb(sql, conn=duck_conn), repeats)
+            rows.append({"query": name, "sqlite": sqlite_seconds, "duckdb": duck_seconds,
+                         "sqlite_rows": len(sqlite_result), "duckdb_rows": len(duck_result)})
+    finally:
+        sqlite_conn.close()
+        duck_conn.close()
+    results = pd.DataFrame(rows).set_index("query")
+    results["speedup"] = results["sqlite"] / results["duckdb"]
+    return results
+
+
+if __name__ == "__main__":
+    from test_the_queries import query_apple, query_sector
+
+    parser = argparse.ArgumentParser(description="Compare the SQLite store with DuckDB over the source tables")
+    parser.add_argument("--db", default=None, help="SQLite database (default: nyse_finance.db)")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per query; the fastest is kept")
+    args = parser.parse_args()
+
+    # A full scan of the price table, the workload a column store is for
+    query_price_scan = """
+    SELECT symbol, COUNT(*) AS days, AVG(close) AS avg_close, MAX(high) AS max_high
+    FROM prices
+    GROUP BY symbol
+    """
+    queries = {"company financials + price": query_apple, "sector revenue": query_sector,
+               "price scan by symbol": query_price_scan}
+    print(compare_backends(queries, args.db, args.repeats).round(4))
@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 from statsmodels.tsa.arima.model import ARIMA
 from prophet import Prophet
+from reporting import save_figure
 
 # Load the dataset
 try:
@@ -80,7 +81,7 @@ try:
     plt.ylabel('Gross Profit ($)')
     plt.legend()
     plt.grid(True)
-    plt.show()
+    save_figure('AAPL_gross_profit_forecasts.png')
     
 except FileNotFoundError:
     print("Error: File 'AAPL_full_forecasts.csv' not found.")
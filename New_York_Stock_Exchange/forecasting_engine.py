@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import signal
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+from csv_cache import read_table
+from instrumentation import stage
+
+# Prophet is optional; only needed when the 'prophet' model is requested
+try:
+    from prophet import Prophet
+    from prophet.serialize import model_from_json, model_to_json
+except ImportError:
+    Prophet = None
+
+ARIMA_ORDER = (1, 1, 1)
+MIN_OBSERVATIONS = 3
+CACHE_PATH = os.path.join('.cache', 'forecasts', 'params.pkl')
+OUTPUT_PATH = 'forecasts.csv'
+
+
+@contextmanager
+def _time_limit(seconds):
+    # SIGALRM is Unix-only; elsewhere tasks simply run without a limit
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def _raise_timeout(signum, frame):
+        raise TimeoutError(f"fit exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# Forecast dates continue the series' typical spacing (annual filings -> 12 months)
+def _future_dates(dates, horizon):
+    dates = pd.DatetimeIndex(dates)
+    months = 12
+    if len(dates) > 1:
+        months = max(1, int(round(np.median(np.diff(dates.asi8)) / 8.64e13 / 30.4375)))
+    return [dates[-1] + pd.DateOffset(months=months * step) for step in range(1, horizon + 1)]
+
+
+def _fit_arima(values, horizon, params):
+    model = ARIMA(np.asarray(values, dtype=float), order=ARIMA_ORDER)
+    # Cached parameters skip the optimizer and only run the Kalman filter
+    results = model.filter(params) if params is not None else model.fit()
+    forecast = results.get_forecast(steps=horizon)
+    interval = forecast.conf_int()
+    return results.params, forecast.predicted_mean, interval[:, 0], interval[:, 1]
+
+
+def _fit_prophet(dates, values, horizon, params):
+    if Prophet is None:
+        raise ImportError("prophet is not installed")
+    if params is not None:
+        model = model_from_json(params)
+    else:
+        model = Prophet()
+        model.fit(pd.DataFrame({'ds': dates, 'y': values}))
+    future = pd.DataFrame({'ds': _future_dates(dates, horizon)})
+    predicted = model.predict(future)
+    return model_to_json(model), predicted['yhat'].to_numpy(), predicted['yhat_lower'].to_numpy(), predicted['yhat_upper'].to_numpy()
+
+
+# Runs in a worker process: fit (or refilter from cached parameters) one
+# model on one ticker's series and return its forecast rows
+def _forecast_series(ticker, model_name, dates, values, horizon, params, timeout):
+    entry = {'ticker': ticker, 'model': model_name, 'params': None, 'status': 'ok', 'rows': []}
+    try:
+        with _time_limit(timeout), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            if model_name == 'arima':
+                fitted, mean, lower, upper = _fit_arima(values, horizon, params)
+            elif model_name == 'prophet':
+                fitted, mean, lower, upper = _fit_prophet(dates, values, horizon, params)
+            else:
+                raise ValueError(f"Unknown model '{model_name}'")
+    except TimeoutError:
+        entry['status'] = 'timeout'
+        return entry
+    except Exception as e:
+        entry['status'] = f"failed: {e}"
+        return entry
+
+    entry['params'] = fitted
+    for date, yhat, lo, hi in zip(_future_dates(dates, horizon), mean, lower, upper):
+        entry['rows'].append({'Date': date, 'Forecast': yhat, 'Lower': lo, 'Upper': hi})
+    return entry
+
+
+def _series_key(ticker, model_name, column, dates, values):
+    payload = json.dumps([ticker, model_name, column, list(ARIMA_ORDER),
+                          [str(d) for d in dates], [float(v) for v in values]])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _save_cache(cache, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+
+# One time series per ticker, ordered by period end
+def ticker_series(fundamentals, column='Total Revenue'):
+    data = fundamentals[['Ticker Symbol', 'Period Ending', column]].dropna()
+    data = data.sort_values(['Ticker Symbol', 'Period Ending'])
+    for ticker, group in data.groupby('Ticker Symbol', observed=True, sort=False):
+        yield str(ticker), group['Period Ending'].tolist(), group[column].to_numpy(dtype=float)
+
+
+# Fit the chosen models for every ticker on a process pool and return one
+# consolidated forecast table. Fitted parameters are cached per series, so
+# unchanged series are only refiltered on the next run.
+def forecast_all(fundamentals, column='Total Revenue', models=('arima',), horizon=4,
+                 timeout=30, max_workers=None, cache_path=CACHE_PATH):
+    cache = _load_cache(cache_path)
+    tasks = []
+    for ticker, dates, values in ticker_series(fundamentals, column):
+        if len(values) < MIN_OBSERVATIONS:
+            continue
+        for model_name in models:
+            key = _series_key(ticker, model_name, column, dates, values)
+            tasks.append((key, (ticker, model_name, dates, values, horizon, cache.get(key), timeout)))
+
+    rows = []
+    with stage(f"forecast fitting ({', '.join(models)})", rows_in=len(tasks)), \
+            ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [(key, pool.submit(_forecast_series, *args)) for key, args in tasks]
+        for key, future in futures:
+            entry = future.result()
+            if entry['params'] is not None:
+                cache[key] = entry['params']
+            if not entry['rows']:
+                rows.append({'Ticker Symbol': entry['ticker'], 'Model': entry['model'], 'Status': entry['status']})
+            for row in entry['rows']:
+                rows.append({'Ticker Symbol': entry['ticker'], 'Model': entry['model'], **row, 'Status': entry['status']})
+
+    _save_cache(cache, cache_path)
+    columns = ['Ticker Symbol', 'Model', 'Date', 'Forecast', 'Lower', 'Upper', 'Status']
+    return pd.DataFrame(rows, columns=columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forecast a fundamentals column for every ticker")
+    parser.add_argument("--column", default="Total Revenue")
+    parser.add_argument("--models", nargs="+", default=["arima"], choices=["arima", "prophet"])
+    parser.add_argument("--horizon", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30, help="seconds allowed per series fit")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    fundamentals = read_table("fundamentals", columns=['Ticker Symbol', 'Period Ending', args.column])
+    forecasts = forecast_all(fundamentals, args.column, args.models, args.horizon, args.timeout, args.workers)
+    forecasts.to_csv(args.output, index=False)
+
+    status = forecasts.drop_duplicates(['Ticker Symbol', 'Model'])['Status']
+    print(f"Fitted {len(status)} series for {forecasts['Ticker Symbol'].nunique()} tickers: "
+          f"{(status == 'ok').sum()} ok, {(status != 'ok').sum()} failed or timed out")
+    print(f"Forecasts saved to '{args.output}'")
@@ -0,0 +1,174 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+GROWTH_CACHE_DIR = os.path.join('.cache', 'growth')
+# Columns every growth frame carries, so the risk and trend scripts share
+# one cached result; columns missing from a frame are skipped
+GROWTH_COLUMNS = [
+    'Total Revenue', 'Gross Profit', 'Operating Income', 'Net Income',
+    'Inventory', 'Total Assets', 'Net Cash Flow-Operating', 'Earnings Per Share',
+]
+# PoP:  change against the ticker's previous reported period (QoQ for
+#       quarterly filers; the fundamentals file is mostly annual)
+# YoY:  change against the period that ended about a year earlier
+# CAGR: compound annual growth since the ticker's first period
+KINDS = ('PoP', 'YoY', 'CAGR')
+# How far the year-earlier period end may be from exactly one year back
+YOY_TOLERANCE_DAYS = 45
+DAYS_PER_YEAR = 365.25
+
+# Growth frames already computed in this process, by content key
+_memo = {}
+
+
+# Sort rows once by (ticker, period end). Returns the sort order plus, in
+# sorted order, the ticker codes, period end as day numbers and the
+# position of each ticker's first row. Rows without a ticker or a period
+# end get code -1 and never take part in a comparison.
+def period_order(df):
+    codes = pd.factorize(df['Ticker Symbol'], sort=True)[0].astype(np.int64)
+    dates = pd.to_datetime(df['Period Ending'], errors='coerce').to_numpy(dtype='datetime64[D]')
+    codes[np.isnat(dates)] = -1
+    days = np.where(np.isnat(dates), 0, dates.astype(np.int64))
+
+    order = np.lexsort((days, codes))
+    codes, days = codes[order], days[order]
+    n = len(codes)
+    first = np.ones(n, dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    starts = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+    return order, codes, days, starts
+
+
+def _change(current, base):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return current / base - 1.0
+
+
+# Position of the row one year earlier in the same ticker, or -1. Ticker
+# and day are folded into one sorted key so a single searchsorted finds
+# the first candidate inside the tolerance window for every row at once.
+def _year_earlier(codes, days):
+    span = np.int64(days.max() - days.min() + 2 * 366 + 2 * YOY_TOLERANCE_DAYS) if len(days) else 1
+    offset = days.min() - 366 - YOY_TOLERANCE_DAYS if len(days) else 0
+    keys = codes * span + (days - offset)
+    target = keys - 365
+    pos = np.searchsorted(keys, target - YOY_TOLERANCE_DAYS, side='left')
+    found = pos < len(keys)
+    pos = np.where(found, pos, 0)
+    found &= (keys[pos] <= target + YOY_TOLERANCE_DAYS) & (codes[pos] == codes) & (codes >= 0)
+    return np.where(found, pos, -1)
+
+
+# Growth of `columns` in one vectorized pass over the sorted rows: every
+# comparison row is found through the ticker boundary offsets, so there is
+# no per-ticker loop. The result is aligned to df's index, with columns
+# named '<column> <kind>'.
+def compute_growth(df, columns=None, kinds=KINDS):
+    if columns is None:
+        columns = [c for c in GROWTH_COLUMNS if c in df.columns]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        raise ValueError(f"Unknown growth kind(s) {unknown}. Expected any of: {', '.join(KINDS)}")
+
+    order, codes, days, starts = period_order(df)
+    values = df[columns].to_numpy(dtype=np.float64)[order]
+    n = len(order)
+    pos = np.arange(n)
+    grouped = codes >= 0
+
+    sorted_out = {}
+    if 'PoP' in kinds:
+        has_prev = grouped & (pos > starts)
+        prev = np.where(has_prev, pos - 1, 0)
+        sorted_out['PoP'] = np.where(has_prev[:, None], _change(values, values[prev]), np.nan)
+    if 'YoY' in kinds:
+        earlier = _year_earlier(codes, days)
+        has_earlier = earlier >= 0
+        base = values[np.where(has_earlier, earlier, 0)]
+        sorted_out['YoY'] = np.where(has_earlier[:, None], _change(values, base), np.nan)
+    if 'CAGR' in kinds:
+        years = (days - days[starts]) / DAYS_PER_YEAR
+        ratio = _change(values, values[starts]) + 1.0
+        valid = (grouped & (years > 0))[:, None] & (ratio > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cagr = np.power(np.where(valid, ratio, 1.0), 1.0 / np.where(years > 0, years, 1.0)[:, None]) - 1.0
+        sorted_out['CAGR'] = np.where(valid, cagr, np.nan)
+
+    result = {}
+    for kind in kinds:
+        unsorted = np.empty_like(sorted_out[kind])
+        unsorted[order] = sorted_out[kind]
+        for j, col in enumerate(columns):
+            result[f'{col} {kind}'] = unsorted[:, j]
+    return pd.DataFrame(result, index=df.index)
+
+
+# The key covers the ticker, period and value columns (with the index) and
+# the requested kinds, so any change to the inputs gives a new entry
+def growth_key(df, columns, kinds):
+    h = hashlib.sha1()
+    h.update(repr((list(columns), list(kinds))).encode())
+    inputs = df[['Ticker Symbol', 'Period Ending'] + list(columns)]
+    h.update(pd.util.hash_pandas_object(inputs, index=True).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+# Growth for the shared column set plus any `extra` columns, computed once
+# per input and reused from memory or from .cache/growth afterwards. Only
+# the latest file is kept on disk.
+def load_growth(df, extra=(), kinds=KINDS, cache_dir=GROWTH_CACHE_DIR):
+    columns = list(dict.fromkeys([c for c in GROWTH_COLUMNS if c in df.columns] + list(extra)))
+    key = growth_key(df, columns, kinds)
+    if key in _memo:
+        return _memo[key]
+
+    path = os.path.join(cache_dir, f"growth-{key}.pkl")
+    if os.path.exists(path):
+        growth = pd.read_pickle(path)
+    else:
+        growth = compute_growth(df, columns, kinds)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        growth.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        for fname in os.listdir(cache_dir):
+            if fname.startswith("growth-") and fname.endswith(".pkl") and fname != os.path.basename(path):
+                os.remove(os.path.join(cache_dir, fname))
+    _memo[key] = growth
+    return growth
+
+
+# Return a copy of df with the requested growth columns attached.
+# `rename` maps '<column> <kind>' names to the names a script expects.
+def add_growth(df, names, rename=None):
+    growth = load_growth(df, extra=[name.rsplit(' ', 1)[0] for name in names])[list(names)]
+    if rename:
+        growth = growth.rename(columns=rename)
+    df = df.copy()
+    for col in growth.columns:
+        df[col] = growth[col]
+    return df
+
+
+if __name__ == "__main__":
+    import time
+    from schema import read_merged
+
+    parser = argparse.ArgumentParser(description="Compute per-ticker growth for the fundamentals")
+    parser.add_argument("--output", default="fundamentals_growth.csv")
+    args = parser.parse_args()
+
+    fundamentals_merged = read_merged()
+    start = time.perf_counter()
+    growth = compute_growth(fundamentals_merged)
+    print(f"Growth for {len(fundamentals_merged)} rows x {growth.shape[1]} measures in {time.perf_counter() - start:.4f}s")
+    print(growth.describe().T[['count', '50%']].round(3))
+
+    growth = pd.concat([fundamentals_merged[['Ticker Symbol', 'Period Ending']], growth], axis=1)
+    growth.to_csv(args.output, index=False)
+    print(f"Growth table saved to '{args.output}'")
@@ -0,0 +1,178 @@
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+
+import pandas as pd
+
+# resource is Unix-only; without it (and without /proc) there is no peak RSS
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PROFILE_DIR = os.path.join('.cache', 'profiles')
+# Environment switches, so any script can be instrumented without edits:
+#   NYSE_RUN_REPORT=run.json         write the stage report on exit (.json or .csv)
+#   NYSE_PROFILE_STAGES=a,b          attach cProfile to the named stages
+#   NYSE_TRACEMALLOC_STAGES=a,b      record the Python heap peak of the named stages
+REPORT_ENV = 'NYSE_RUN_REPORT'
+PROFILE_ENV = 'NYSE_PROFILE_STAGES'
+TRACEMALLOC_ENV = 'NYSE_TRACEMALLOC_STAGES'
+
+
+@dataclass
+class StageRecord:
+    name: str
+    started_at: float
+    wall_seconds: float = None
+    cpu_seconds: float = None
+    rss_mb: float = None
+    peak_rss_mb: float = None
+    rows_in: int = None
+    rows_out: int = None
+    heap_peak_mb: float = None
+    profile_path: str = None
+
+
+# Every finished stage of this process, in completion order
+RECORDS = []
+
+
+def _status_mb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    return _status_mb('VmRSS')
+
+
+# Peak resident memory of the process, or None where it cannot be read.
+# VmHWM is preferred on Linux since ru_maxrss survives exec and can report
+# a parent's peak.
+def peak_rss_mb():
+    peak = _status_mb('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+# Restart the VmHWM peak from the current RSS (Linux only, no-op elsewhere)
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _selected(name, env):
+    return name in [s.strip() for s in os.environ.get(env, '').split(',') if s.strip()]
+
+
+def _rows(obj):
+    if isinstance(obj, tuple):
+        obj = obj[0] if obj else None
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+# Time one named stage. The yielded record can be filled in by the caller,
+# e.g. `rec.rows_out = len(result)`. With profile=True (or the stage named in
+# NYSE_PROFILE_STAGES) a cProfile dump is written to .cache/profiles; with
+# trace_memory=True (or NYSE_TRACEMALLOC_STAGES) the Python heap peak is kept.
+@contextmanager
+def stage(name, rows_in=None, profile=None, trace_memory=None):
+    profile = _selected(name, PROFILE_ENV) if profile is None else profile
+    trace_memory = _selected(name, TRACEMALLOC_ENV) if trace_memory is None else trace_memory
+
+    record = StageRecord(name, time.time(), rows_in=rows_in)
+    profiler = cProfile.Profile() if profile else None
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if trace_memory:
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+        record.wall_seconds = time.perf_counter() - wall
+        record.cpu_seconds = time.process_time() - cpu
+        record.rss_mb = current_rss_mb()
+        record.peak_rss_mb = peak_rss_mb()
+        if trace_memory:
+            record.heap_peak_mb = tracemalloc.get_traced_memory()[1] / (1 << 20)
+            if started_tracing:
+                tracemalloc.stop()
+        if profiler:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+            record.profile_path = os.path.join(PROFILE_DIR, f"{safe_name}-{os.getpid()}.prof")
+            profiler.dump_stats(record.profile_path)
+        RECORDS.append(record)
+
+
+# Decorator form of stage(): rows in/out are taken from the length of the
+# first argument and of the result (or its first element for tuples)
+def instrument(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, rows_in=_rows(args[0]) if args else None) as record:
+                result = func(*args, **kwargs)
+                record.rows_out = _rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def report_frame(records=None):
+    records = RECORDS if records is None else records
+    return pd.DataFrame([asdict(r) for r in records], columns=list(StageRecord.__dataclass_fields__))
+
+
+def write_report(path, records=None):
+    frame = report_frame(records)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump({'argv': sys.argv, 'pid': os.getpid(), 'stages': frame.to_dict('records')}, f, indent=2, default=str)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def _write_report_at_exit():
+    # Only the process that started the run writes; spawned pool workers
+    # inherit the variables but not the pid
+    if RECORDS and os.environ.get(_REPORT_PID_ENV) == str(os.getpid()):
+        write_report(os.environ[REPORT_ENV])
+
+
+_REPORT_PID_ENV = 'NYSE_RUN_REPORT_PID'
+if os.environ.get(REPORT_ENV):
+    os.environ.setdefault(_REPORT_PID_ENV, str(os.getpid()))
+    atexit.register(_write_report_at_exit)
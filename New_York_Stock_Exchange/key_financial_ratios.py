@@ -1,26 +1,25 @@
 import pandas as pd
+from ratio_engine import add_ratios
 
 # Load your data (replace with your actual data loading code)
 fundamentals = pd.read_csv('fundamentals.csv')  # or from SQL, etc.
 
-# Profitability Ratios
-fundamentals['Gross Margin'] = (fundamentals['Total Revenue'] - fundamentals['Cost of Revenue']) / fundamentals['Total Revenue']
-fundamentals['Operating Margin'] = fundamentals['Operating Income'] / fundamentals['Total Revenue']
-fundamentals['Net Profit Margin'] = fundamentals['Net Income'] / fundamentals['Total Revenue']
-
-# Liquidity Ratios
-fundamentals['Current Ratio'] = fundamentals['Total Current Assets'] / fundamentals['Total Current Liabilities']
-fundamentals['Quick Ratio'] = (fundamentals['Total Current Assets'] - fundamentals['Inventory']) / fundamentals['Total Current Liabilities']
-
-# Leverage Ratios
-fundamentals['Debt to Equity'] = fundamentals['Total Liabilities'] / fundamentals['Total Equity']
-fundamentals['Debt Ratio'] = fundamentals['Total Liabilities'] / fundamentals['Total Assets']
-
-# Efficiency Ratios
-fundamentals['Asset Turnover'] = fundamentals['Total Revenue'] / fundamentals['Total Assets']
-fundamentals['Inventory Turnover'] = fundamentals['Cost of Revenue'] / fundamentals['Inventory']
+# Profitability, Liquidity, Leverage and Efficiency Ratios from the shared ratio engine.
+# 'Debt to Equity' here is Total Liabilities / Total Equity. The reported
+# Gross Margin and Current Ratio columns are replaced by the computed ones.
+fundamentals = add_ratios(
+    fundamentals,
+    [
+        'Gross Margin', 'Operating Margin', 'Net Margin',
+        'Current Ratio', 'Quick Ratio',
+        'Liabilities-to-Equity', 'Debt Ratio',
+        'Asset Turnover', 'Inventory Turnover',
+    ],
+    rename={'Net Margin': 'Net Profit Margin', 'Liabilities-to-Equity': 'Debt to Equity'},
+    overwrite=True
+)
 
 # Save the results
 fundamentals.to_csv('fundamentals_with_ratios.csv', index=False)
 
-print(fundamentals.columns.tolist())
\ No newline at end of file
+print(fundamentals.columns.tolist())
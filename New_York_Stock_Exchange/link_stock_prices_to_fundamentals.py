@@ -1,33 +1,27 @@
-import pandas as pd
+from csv_cache import read_table
+from asof_join import asof_join
+from securities_dimension import securities_dimension
 
-# Load the datasets (replace paths with your actual files)
-fundamentals = pd.read_csv("fundamentals.csv")
-prices = pd.read_csv("prices-split-adjusted.csv")
-securities = pd.read_csv("securities.csv")
+# Load the datasets (date columns are already parsed by the cache); prices
+# keep their exact float64 values for the CSV
+fundamentals = read_table("fundamentals")
+prices = read_table("price_split", exact=True)
 
 # Clean fundamentals: Rename the first column
 fundamentals = fundamentals.rename(columns={fundamentals.columns[0]: 'id'})
 
-# Convert date columns to datetime
-fundamentals['Period Ending'] = pd.to_datetime(fundamentals['Period Ending'])
-prices['date'] = pd.to_datetime(prices['date'])
+# Attach the securities attributes through the ticker dimension
+fundamentals_merged = securities_dimension().denormalize(fundamentals)
 
-# Merge fundamentals with securities
-fundamentals_merged = pd.merge(
-    fundamentals,
-    securities,
-    left_on='Ticker Symbol',
-    right_on='Ticker symbol',
-    how='left'
-)
-
-# Link stock prices to fundamentals (on Ticker + Date)
-merged_data = pd.merge(
+# Link stock prices to fundamentals: last trading day at or before the period end
+# (periods ending on a weekend/holiday get the prior close, at most a week old).
+# Keeps all financials, even if no price data exists
+merged_data = asof_join(
     fundamentals_merged,
     prices,
-    left_on=['Ticker Symbol', 'Period Ending'],
-    right_on=['symbol', 'date'],
-    how='left'  # Keeps all financials, even if no price data exists
+    left_on=('Ticker Symbol', 'Period Ending'),
+    right_on=('symbol', 'date'),
+    tolerance='7D'
 )
 
 # Save the merged data
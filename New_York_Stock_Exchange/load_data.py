@@ -1,9 +1,30 @@
-import pandas as pd
+from csv_cache import TABLES, read_table
 
-# Load all tables
-fundamentals = pd.read_csv("fundamentals.csv")
-prices = pd.read_csv("prices.csv")
-price_split = pd.read_csv("prices-split-adjusted.csv")
-securities = pd.read_csv("securities.csv")
+# Tables are loaded lazily: `ld.fundamentals`, `ld.prices`, `ld.price_split`
+# and `ld.securities` are read on first access and memoized for the process,
+# so scripts that never touch the price tables never parse them.
+_loaded = {}
 
-print(fundamentals.head())  # Check structure
\ No newline at end of file
+
+# Load a table with optional column projection and ticker/date filters pushed
+# down into the read. Restricted reads are not memoized; full tables are.
+def load(name, columns=None, tickers=None, start=None, end=None):
+    if columns is None and tickers is None and start is None and end is None:
+        return __getattr__(name)
+    return read_table(name, columns=columns, tickers=tickers, start=start, end=end)
+
+
+def __getattr__(name):
+    if name in TABLES:
+        if name not in _loaded:
+            _loaded[name] = read_table(name)
+        return _loaded[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(TABLES))
+
+
+if __name__ == "__main__":
+    print(load("fundamentals").head())  # Check structure
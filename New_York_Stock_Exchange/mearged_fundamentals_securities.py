@@ -1,13 +1,19 @@
-import pandas as pd
 import load_data as ld
-fundamentals_merged = pd.merge(
-    ld.fundamentals,
-    ld.securities,
-    left_on='Ticker Symbol',
-    right_on='Ticker symbol',
-    how='left'
-)
-
-# store the merged DataFrame in a file
-fundamentals_merged.to_csv('merged_fundamentals_securities.csv', index=False)
-print("Merged fundamentals and securities data saved to 'merged_fundamentals_securities.csv'")
\ No newline at end of file
+from schema import apply_schema
+from instrumentation import instrument
+from securities_dimension import SecuritiesDimension
+
+
+# Securities attributes gathered onto the fundamentals rows through the
+# ticker dimension; compact dtypes (see schema.py)
+@instrument("merge fundamentals+securities")
+def merge_fundamentals_securities(fundamentals, securities):
+    return apply_schema(SecuritiesDimension(securities).denormalize(fundamentals))
+
+
+if __name__ == "__main__":
+    fundamentals_merged = merge_fundamentals_securities(ld.fundamentals, ld.securities)
+
+    # store the merged DataFrame in a file
+    fundamentals_merged.to_csv('merged_fundamentals_securities.csv', index=False)
+    print("Merged fundamentals and securities data saved to 'merged_fundamentals_securities.csv'")
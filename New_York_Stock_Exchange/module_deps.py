@@ -0,0 +1,48 @@
+import ast
+import os
+import sys
+
+# Modules living in this directory count as project code
+SOURCE_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def _local_path(module):
+    path = os.path.join(SOURCE_DIR, module.split(".")[0] + ".py")
+    return path if os.path.exists(path) else None
+
+
+# File of a loaded module; covers functions defined in the script being run
+# (module '__main__')
+def _module_path(module):
+    path = getattr(sys.modules.get(module), "__file__", None)
+    if path and os.path.dirname(os.path.realpath(path)) == SOURCE_DIR:
+        return os.path.realpath(path)
+    return _local_path(module)
+
+
+# Source files of a module and of every project module it imports,
+# directly or through other project modules
+def module_files(module):
+    files, todo = set(), [_module_path(module)]
+    while todo:
+        path = todo.pop()
+        if path is None or path in files:
+            continue
+        files.add(path)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                todo.extend(_local_path(alias.name) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(_local_path(node.module))
+    return sorted(files)
+
+
+# Feed the names and contents of those files into hash object `h`
+def hash_module_sources(module, h):
+    for path in module_files(module):
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h
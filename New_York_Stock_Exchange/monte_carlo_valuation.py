@@ -0,0 +1,114 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import read_table
+
+# Distributions are given as numpy Generator method names plus their
+# parameters, e.g. {'dist': 'normal', 'loc': 0.05, 'scale': 0.03}
+DEFAULT_GROWTH = {'dist': 'normal', 'loc': 0.05, 'scale': 0.03}
+DEFAULT_DISCOUNT = {'dist': 'uniform', 'low': 0.08, 'high': 0.12}
+PERCENTILES = (5, 25, 50, 75, 95)
+# Upper bound on simulated cash flows held in memory per chunk
+MAX_CHUNK_ELEMENTS = 20_000_000
+
+
+def _draw(rng, spec, size):
+    params = {k: v for k, v in spec.items() if k != 'dist'}
+    return getattr(rng, spec['dist'])(size=size, **params)
+
+
+# Latest free cash flow per company: operating cash flow + capital
+# expenditures (reported as a negative number)
+def base_cash_flows(fundamentals):
+    latest = fundamentals.sort_values('Period Ending').groupby('Ticker Symbol', observed=True).tail(1)
+    latest = latest.set_index(latest['Ticker Symbol'].astype(str)).sort_index()
+    result = pd.DataFrame({
+        'Free Cash Flow': latest['Net Cash Flow-Operating'] + latest['Capital Expenditures'],
+        'Shares Outstanding': latest['Estimated Shares Outstanding'],
+    })
+    result.index.name = 'Ticker Symbol'
+    return result.dropna(subset=['Free Cash Flow'])
+
+
+# DCF for a block of companies over a (companies x simulations x periods)
+# grid, with one discount rate per (company, simulation). Growth and
+# discounting are folded into a single cumulative product, so the present
+# value of period t is base * prod_{k<=t} (1 + g_k) / (1 + r).
+def _simulate_chunk(base, n_simulations, n_periods, growth, discount, terminal_growth, seed_seq, percentiles):
+    rng = np.random.default_rng(seed_seq)
+    shape = (len(base), n_simulations, n_periods)
+
+    rate = _draw(rng, discount, (len(base), n_simulations, 1))
+    factors = _draw(rng, growth, shape)
+    factors += 1.0
+    factors /= 1.0 + rate
+    np.cumprod(factors, axis=2, out=factors)
+    values = factors.sum(axis=2)
+
+    if terminal_growth is not None:
+        spread = rate[:, :, 0] - terminal_growth
+        values += factors[:, :, -1] * (1.0 + terminal_growth) / np.where(spread > 0, spread, np.nan)
+
+    values *= base[:, None]
+    return np.nanpercentile(values, percentiles, axis=1).T, np.nanmean(values, axis=1)
+
+
+# Monte Carlo DCF for every company at once. Companies are split into
+# chunks that keep the simulated cash flows under `max_elements` floats;
+# each chunk gets its own child seed, so results do not depend on how many
+# workers run them.
+def simulate_valuations(bases, n_simulations=100_000, n_periods=5, growth=DEFAULT_GROWTH,
+                        discount=DEFAULT_DISCOUNT, terminal_growth=None, seed=42,
+                        percentiles=PERCENTILES, max_elements=MAX_CHUNK_ELEMENTS, max_workers=None):
+    base = bases['Free Cash Flow'].to_numpy(dtype=np.float64)
+    per_company = n_simulations * n_periods
+    chunk = max(1, max_elements // per_company)
+    starts = range(0, len(base), chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+
+    args = [(base[s:s + chunk], n_simulations, n_periods, growth, discount, terminal_growth, seq, percentiles)
+            for s, seq in zip(starts, seeds)]
+    if max_workers == 1:
+        results = [_simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*args)))
+
+    quantiles = np.vstack([q for q, _ in results]) if results else np.empty((0, len(percentiles)))
+    means = np.concatenate([m for _, m in results]) if results else np.empty(0)
+    valuation = pd.DataFrame(quantiles, index=bases.index, columns=[f"P{p}" for p in percentiles])
+    valuation.insert(0, 'Mean', means)
+    if 50 in percentiles:
+        valuation['Median Value per Share'] = valuation['P50'] / bases['Shares Outstanding']
+    return valuation
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Monte Carlo DCF valuation for every company")
+    parser.add_argument("--simulations", type=int, default=100_000)
+    parser.add_argument("--periods", type=int, default=5)
+    parser.add_argument("--terminal-growth", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="dcf_valuation.csv")
+    args = parser.parse_args()
+
+    fundamentals = read_table("fundamentals", columns=[
+        'Ticker Symbol', 'Period Ending', 'Net Cash Flow-Operating',
+        'Capital Expenditures', 'Estimated Shares Outstanding'])
+    bases = base_cash_flows(fundamentals)
+
+    start = time.perf_counter()
+    valuation = simulate_valuations(bases, args.simulations, args.periods, terminal_growth=args.terminal_growth,
+                                    seed=args.seed, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    valuation.to_csv(args.output)
+    print(f"Simulated {args.simulations:,} paths for {len(valuation)} companies in {elapsed:.2f}s")
+    print(valuation.head())
+    print(f"Valuations saved to '{args.output}'")
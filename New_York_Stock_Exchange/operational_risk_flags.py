@@ -1,33 +1,33 @@
 import pandas as pd
+from schema import read_merged
+from risk_screen import CASH_FLOW_ISSUE, INVENTORY_RISK, RiskScreen
 
-# Load data
-fundamentals_merged = pd.read_csv('merged_fundamentals_securities.csv')
 
-# Calculate Required Metrics First 
+def flag_operational_risks(fundamentals_merged):
+    # Growth comes from the shared growth engine: each ticker's previous period, in period order
+    screen = RiskScreen(fundamentals_merged)
+    # Full rows plus the growth metrics behind the flags
+    columns = list(fundamentals_merged.columns) + ['Revenue Growth', 'Inventory Growth']
+    growth_names = {'Revenue Growth': 'Revenue_Growth', 'Inventory Growth': 'Inventory_Change'}
 
-# 1. Calculate Revenue Growth (quarter-over-quarter)
-fundamentals_merged['Revenue_Growth'] = fundamentals_merged.groupby('Ticker Symbol')['Total Revenue'].pct_change()
+    # A. Inventory Risks (growing inventory despite low revenue growth)
+    inventory_risks = screen.view(INVENTORY_RISK, columns).rename(columns=growth_names)
 
-# 2. Calculate Inventory Change
-fundamentals_merged['Inventory_Change'] = fundamentals_merged.groupby('Ticker Symbol')['Inventory'].pct_change()
+    # B. Cash Flow Issues (profitable but negative operating cash flow)
+    cash_flow_issues = screen.view(CASH_FLOW_ISSUE, columns).rename(columns=growth_names)
 
-# Risk Detection 
+    return inventory_risks, cash_flow_issues
 
-# A. Inventory Risks (growing inventory despite low revenue growth)
-inventory_risks = fundamentals_merged[
-    (fundamentals_merged['Inventory_Change'] > 0.3) & 
-    (fundamentals_merged['Revenue_Growth'] < 0.1)
-]
 
-# B. Cash Flow Issues (profitable but negative operating cash flow)
-cash_flow_issues = fundamentals_merged[
-    (fundamentals_merged['Net Income'] > 0) & 
-    (fundamentals_merged['Net Cash Flow-Operating'] < 0)
-]
+if __name__ == "__main__":
+    # Load data
+    fundamentals_merged = read_merged()
 
-# Save Results
-inventory_risks.to_csv('inventory_risks.csv', index=False)
-cash_flow_issues.to_csv('cash_flow_issues.csv', index=False)
+    inventory_risks, cash_flow_issues = flag_operational_risks(fundamentals_merged)
 
-print(f"Found {len(inventory_risks)} inventory risk cases")
-print(f"Found {len(cash_flow_issues)} cash flow issues")
\ No newline at end of file
+    # Save Results
+    inventory_risks.to_csv('inventory_risks.csv', index=False)
+    cash_flow_issues.to_csv('cash_flow_issues.csv', index=False)
+
+    print(f"Found {len(inventory_risks)} inventory risk cases")
+    print(f"Found {len(cash_flow_issues)} cash flow issues")
@@ -0,0 +1,224 @@
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+import pandas as pd
+
+from csv_cache import cache_path, read_table
+from module_deps import hash_module_sources
+from mearged_fundamentals_securities import merge_fundamentals_securities
+from anomaly_detection import detect_anomalies
+from anomaly_scoring import MODEL_PATH
+from financial_risk_identification import identify_financial_risks
+from mitigation_strategies import score_risks
+from operational_risk_flags import flag_operational_risks
+from sector_wise_comparison import compare_sectors
+from time_series_trends import analyze_sector_trends
+
+CACHE_DIR = os.path.join(".cache", "pipeline")
+
+
+# One node of the analytics DAG. `sources` are raw tables read through
+# csv_cache, `inputs` are outputs of other stages, and the function returns
+# one DataFrame per name in `outputs` (in the same order). `artifacts` are
+# other files the stage reads, such as persisted models.
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: object
+    inputs: tuple = ()
+    outputs: tuple = ()
+    sources: tuple = ()
+    artifacts: tuple = ()
+
+
+STAGES = [
+    Stage("merge", merge_fundamentals_securities,
+          sources=("fundamentals", "securities"),
+          outputs=("fundamentals_merged",)),
+    Stage("anomalies", detect_anomalies,
+          inputs=("fundamentals_merged",),
+          outputs=("fundamentals_with_anomalies", "anomaly_report"),
+          artifacts=(MODEL_PATH,)),
+    Stage("financial_risks", identify_financial_risks,
+          inputs=("fundamentals_merged",),
+          outputs=("fundamentals_with_altman_z", "high_risk_companies", "debt_risks")),
+    Stage("risk_scores", score_risks,
+          inputs=("fundamentals_merged",),
+          outputs=("fundamentals_with_risk_scores",),
+          artifacts=(MODEL_PATH,)),
+    Stage("operational_risks", flag_operational_risks,
+          inputs=("fundamentals_merged",),
+          outputs=("inventory_risks", "cash_flow_issues")),
+    Stage("sector_comparison", compare_sectors,
+          inputs=("fundamentals_merged",),
+          outputs=("sector_analysis",)),
+    Stage("sector_trends", analyze_sector_trends,
+          inputs=("fundamentals_merged",),
+          outputs=("fundamentals_with_sector_ratios", "sector_analysis_detailed", "top_companies")),
+]
+
+# Files the standalone scripts write, produced here only with --export
+EXPORTS = {
+    "fundamentals_merged": ("merged_fundamentals_securities.csv", False),
+    "fundamentals_with_anomalies": ("fundamentals_with_anomalies.csv", False),
+    "anomaly_report": ("financial_anomalies_report.csv", False),
+    "high_risk_companies": ("high_risk_companies.csv", False),
+    "debt_risks": ("debt_risks.csv", False),
+    "fundamentals_with_risk_scores": ("fundamentals_with_risk_scores.csv", False),
+    "inventory_risks": ("inventory_risks.csv", False),
+    "cash_flow_issues": ("cash_flow_issues.csv", False),
+    "sector_analysis": ("sector_analysis.csv", False),
+    "sector_analysis_detailed": ("sector_analysis_detailed.csv", True),
+}
+
+
+def frame_hash(df):
+    h = hashlib.sha1()
+    h.update(repr([str(c) for c in df.columns]).encode())
+    h.update(repr([str(t) for t in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+# A stage is rebuilt when its code (including the pipeline modules it
+# imports), its source tables, its artifacts or the content of any of its
+# inputs changes
+def _stage_key(stage, hashes):
+    h = hashlib.sha1(stage.name.encode())
+    hash_module_sources(stage.func.__module__, h)
+    for path in stage.artifacts:
+        stat = os.stat(path) if os.path.exists(path) else None
+        h.update(repr((path, stat and stat.st_size, stat and stat.st_mtime_ns)).encode())
+    for table in stage.sources:
+        h.update(os.path.basename(cache_path(table)).encode())
+    for name in stage.inputs:
+        h.update(hashes[name].encode())
+    return h.hexdigest()[:16]
+
+
+def _cache_file(stage, key):
+    return os.path.join(CACHE_DIR, f"{stage.name}-{key}.pkl")
+
+
+def _load_cached(stage, key):
+    path = _cache_file(stage, key)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _save_cached(stage, key, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_file(stage, key)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+    for fname in os.listdir(CACHE_DIR):
+        if fname.startswith(f"{stage.name}-") and fname.endswith(".pkl") and fname != os.path.basename(path):
+            os.remove(os.path.join(CACHE_DIR, fname))
+
+
+# Executed in a worker process
+def _run_stage(func, args):
+    result = func(*args)
+    return result if isinstance(result, tuple) else (result,)
+
+
+# Keep only the requested stages and everything they depend on
+def _select_stages(stages, targets):
+    producers = {out: stage for stage in stages for out in stage.outputs}
+    by_name = {stage.name: stage for stage in stages}
+    if targets is None:
+        needed = set(by_name)
+    else:
+        unknown = [t for t in targets if t not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+        needed, todo = set(), list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in needed:
+                needed.add(name)
+                todo.extend(producers[i].name for i in by_name[name].inputs)
+
+    for stage in stages:
+        missing = [i for i in stage.inputs if i not in producers]
+        if stage.name in needed and missing:
+            raise ValueError(f"Stage '{stage.name}' needs inputs no stage produces: {', '.join(missing)}")
+    return [stage for stage in stages if stage.name in needed], producers
+
+
+# Run the DAG: independent stages execute in parallel on a process pool,
+# DataFrames are handed between stages in memory, and stages whose inputs
+# hash the same as last time are served from the pipeline cache.
+def run_pipeline(stages=STAGES, targets=None, max_workers=None, force=False):
+    stages, producers = _select_stages(stages, targets)
+    results, hashes, report = {}, {}, []
+    done, remaining, pending = set(), list(stages), {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while remaining or pending:
+            ready = [s for s in remaining if all(producers[i].name in done for i in s.inputs)]
+            for stage in ready:
+                remaining.remove(stage)
+                key = _stage_key(stage, hashes)
+                cached = None if force else _load_cached(stage, key)
+                if cached is not None:
+                    results.update(cached["outputs"])
+                    hashes.update(cached["hashes"])
+                    done.add(stage.name)
+                    report.append((stage.name, "cached", 0.0))
+                    continue
+                args = [read_table(t) for t in stage.sources] + [results[i] for i in stage.inputs]
+                future = pool.submit(_run_stage, stage.func, args)
+                pending[future] = (stage, key, time.perf_counter())
+
+            if not pending:
+                if remaining and not ready:
+                    raise ValueError("Pipeline has a dependency cycle: " + ", ".join(s.name for s in remaining))
+                continue
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key, started = pending.pop(future)
+                frames = future.result()
+                if len(frames) != len(stage.outputs):
+                    raise ValueError(f"Stage '{stage.name}' returned {len(frames)} frames, expected {len(stage.outputs)}")
+                outputs = dict(zip(stage.outputs, frames))
+                entry = {"outputs": outputs, "hashes": {k: frame_hash(v) for k, v in outputs.items()}}
+                _save_cached(stage, key, entry)
+                results.update(outputs)
+                hashes.update(entry["hashes"])
+                done.add(stage.name)
+                report.append((stage.name, "ran", time.perf_counter() - started))
+
+    return results, report
+
+
+def export_outputs(results):
+    for name, (path, index) in EXPORTS.items():
+        if name in results:
+            results[name].to_csv(path, index=index)
+            print(f"Saved '{name}' to '{path}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fundamentals analytics pipeline")
+    parser.add_argument("stages", nargs="*", help="stages to run (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="size of the process pool")
+    parser.add_argument("--force", action="store_true", help="ignore cached stage results")
+    parser.add_argument("--export", action="store_true", help="write the CSV files the standalone scripts produce")
+    args = parser.parse_args()
+
+    results, report = run_pipeline(targets=args.stages or None, max_workers=args.workers, force=args.force)
+    for name, status, seconds in report:
+        print(f"{name:<20} {status:<7} {seconds:6.2f}s")
+
+    if args.export:
+        export_outputs(results)
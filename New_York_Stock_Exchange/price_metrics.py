@@ -0,0 +1,140 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from asof_join import asof_join
+from csv_cache import HAS_PYARROW, read_table
+
+VOL_WINDOW = 21
+BETA_WINDOW = 252
+MA_WINDOWS = (20, 50, 200)
+TRADING_DAYS = 252
+OUTPUT_PATH = "price_metrics.parquet" if HAS_PYARROW else "price_metrics.csv"
+
+
+# Rolling sums over `window` rows that never cross a ticker boundary.
+# `starts[i]` is the first row of row i's ticker; windows that are not yet
+# full (or contain fewer than `window` valid values) are NaN.
+def _rolling_sums(values, valid, starts, window):
+    cumsum = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    count = np.concatenate([[0], np.cumsum(valid)])
+    pos = np.arange(len(values))
+    lo = np.maximum(pos - window + 1, starts)
+    full = (pos - lo + 1 == window) & (count[pos + 1] - count[lo] == window)
+    return np.where(full, cumsum[pos + 1] - cumsum[lo], np.nan)
+
+
+# Mean of the valid values in each window of `window` rows within the
+# ticker; NaN until the window is full or when it holds no valid value
+def _rolling_mean(values, valid, starts, window):
+    cumsum = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    count = np.concatenate([[0], np.cumsum(valid)])
+    pos = np.arange(len(values))
+    lo = np.maximum(pos - window + 1, starts)
+    counts = count[pos + 1] - count[lo]
+    full = (pos - lo + 1 == window) & (counts > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(full, (cumsum[pos + 1] - cumsum[lo]) / counts, np.nan)
+
+
+# Daily returns, rolling volatility, drawdown from the running peak, moving
+# averages and rolling beta against an equal-weighted index of all tickers.
+# Rows are sorted by (symbol, date) once; every window is then a cumulative
+# sum difference bounded by the ticker's first row, so there is no
+# per-ticker Python loop.
+def compute_price_metrics(prices, vol_window=VOL_WINDOW, beta_window=BETA_WINDOW, ma_windows=MA_WINDOWS):
+    prices = prices[['symbol', 'date', 'close']].sort_values(['symbol', 'date'], kind='stable')
+    codes, symbols = pd.factorize(prices['symbol'], sort=True)
+    close = prices['close'].to_numpy(dtype=np.float64)
+    n = len(close)
+
+    # Row index of each ticker's first row, broadcast to all its rows
+    first = np.ones(n, dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    starts = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+
+    prev = np.empty(n)
+    prev[0] = np.nan
+    prev[1:] = close[:-1]
+    returns = np.where(first, np.nan, close / prev - 1.0)
+    valid = np.isfinite(returns)
+
+    # Equal-weighted market return per date, mapped back onto every row
+    date_codes, _ = pd.factorize(prices['date'])
+    market_sum = np.bincount(date_codes, weights=np.where(valid, returns, 0.0))
+    market_count = np.bincount(date_codes, weights=valid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        market = (market_sum / market_count)[date_codes]
+
+    result = {
+        'symbol': pd.Categorical.from_codes(codes, symbols),
+        'date': prices['date'].to_numpy(),
+        'close': close.astype(np.float32),
+        'Return': returns.astype(np.float32),
+    }
+
+    s1 = _rolling_sums(returns, valid, starts, vol_window)
+    s2 = _rolling_sums(returns ** 2, valid, starts, vol_window)
+    variance = (s2 - s1 * s1 / vol_window) / (vol_window - 1)
+    result['Volatility'] = (np.sqrt(np.maximum(variance, 0.0)) * np.sqrt(TRADING_DAYS)).astype(np.float32)
+
+    peak = pd.Series(close).groupby(codes).cummax().to_numpy()
+    result['Drawdown'] = (close / peak - 1.0).astype(np.float32)
+
+    both = valid & np.isfinite(market)
+    sr = _rolling_sums(returns, both, starts, beta_window)
+    sm = _rolling_sums(market, both, starts, beta_window)
+    srm = _rolling_sums(returns * market, both, starts, beta_window)
+    smm = _rolling_sums(market ** 2, both, starts, beta_window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        beta = (srm - sr * sm / beta_window) / (smm - sm * sm / beta_window)
+    result['Beta'] = beta.astype(np.float32)
+
+    # Moving averages skip missing closes: the mean of the finite closes in
+    # each full window, so a bad tick only affects the windows it falls in
+    finite = np.isfinite(close)
+    for window in ma_windows:
+        result[f'MA_{window}'] = _rolling_mean(close, finite, starts, window).astype(np.float32)
+
+    return pd.DataFrame(result)
+
+
+# Price metrics as of each fundamentals period end (last trading day on or
+# before it), for the risk scripts
+def metrics_at_period_end(fundamentals, metrics, tolerance='7D'):
+    columns = [c for c in metrics.columns if c not in ('symbol', 'date')]
+    return asof_join(fundamentals, metrics, tolerance=tolerance, columns=columns)
+
+
+def save_metrics(metrics, path=OUTPUT_PATH):
+    if path.endswith('.parquet'):
+        metrics.to_parquet(path, index=False)
+    else:
+        metrics.to_csv(path, index=False)
+
+
+def load_metrics(path=OUTPUT_PATH):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, parse_dates=['date'], dtype={'symbol': 'category'})
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Rolling return and risk metrics for every ticker")
+    parser.add_argument("--vol-window", type=int, default=VOL_WINDOW)
+    parser.add_argument("--beta-window", type=int, default=BETA_WINDOW)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    prices = read_table("price_split", columns=['symbol', 'date', 'close'])
+    start = time.perf_counter()
+    metrics = compute_price_metrics(prices, args.vol_window, args.beta_window)
+    elapsed = time.perf_counter() - start
+
+    save_metrics(metrics, args.output)
+    print(f"Computed metrics for {len(metrics):,} rows in {elapsed:.2f}s")
+    print(metrics.dropna().tail())
+    print(f"Metrics saved to '{args.output}'")
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import cache_path, read_table
+
+STORE_DIR = os.path.join(".cache", "price_store")
+SOURCE = "price_split"
+
+# One fixed-size record per trading day, laid out contiguously by (symbol, date)
+RECORD = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "float32"),
+    ("close", "float32"),
+    ("low", "float32"),
+    ("high", "float32"),
+    ("volume", "float64"),
+])
+
+
+# The store is tied to the source it was built from through the csv_cache
+# key, so an edited CSV triggers a rebuild
+def _source_key(source):
+    return os.path.basename(cache_path(source))
+
+
+def build_price_store(source=SOURCE, store_dir=STORE_DIR):
+    prices = read_table(source).sort_values(["symbol", "date"], kind="stable")
+    os.makedirs(store_dir, exist_ok=True)
+    # meta.json is written last, so an interrupted build is never taken as current
+    meta_path = os.path.join(store_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    records = np.lib.format.open_memmap(os.path.join(store_dir, "prices.npy"), mode="w+",
+                                        dtype=RECORD, shape=(len(prices),))
+    records["date"] = prices["date"].to_numpy(dtype="datetime64[D]")
+    for field in RECORD.names[1:]:
+        records[field] = prices[field].to_numpy()
+    records.flush()
+    del records
+
+    # offsets[i]:offsets[i + 1] is the slice of records for symbols[i]
+    symbols, counts = np.unique(prices["symbol"].to_numpy(dtype=str), return_counts=True)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    np.save(os.path.join(store_dir, "symbols.npy"), symbols)
+    np.save(os.path.join(store_dir, "offsets.npy"), offsets)
+    with open(meta_path, "w") as f:
+        json.dump({"source": _source_key(source), "rows": len(prices)}, f)
+
+
+# Read-only view over the store. Records stay on disk and are paged in by
+# the OS; get_prices returns a slice of the memmap without copying.
+class PriceStore:
+    def __init__(self, store_dir=STORE_DIR):
+        self.records = np.load(os.path.join(store_dir, "prices.npy"), mmap_mode="r")
+        symbols = np.load(os.path.join(store_dir, "symbols.npy"))
+        offsets = np.load(os.path.join(store_dir, "offsets.npy"))
+        self.index = {sym: (int(offsets[i]), int(offsets[i + 1])) for i, sym in enumerate(symbols.tolist())}
+
+    @property
+    def symbols(self):
+        return list(self.index)
+
+    # Records for one symbol with start <= date <= end (either bound optional)
+    def get_prices(self, symbol, start=None, end=None):
+        if symbol not in self.index:
+            raise KeyError(f"Unknown symbol '{symbol}'")
+        lo, hi = self.index[symbol]
+        rows = self.records[lo:hi]
+        if start is not None:
+            rows = rows[np.searchsorted(rows["date"], np.datetime64(pd.Timestamp(start), "D"), side="left"):]
+        if end is not None:
+            rows = rows[:np.searchsorted(rows["date"], np.datetime64(pd.Timestamp(end), "D"), side="right")]
+        return rows
+
+    def get_frame(self, symbol, start=None, end=None):
+        return pd.DataFrame(self.get_prices(symbol, start, end))
+
+
+def _is_current(source, store_dir):
+    meta_path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        return json.load(f).get("source") == _source_key(source)
+
+
+# Open the store, (re)building it first when it is missing or stale
+def open_store(source=SOURCE, store_dir=STORE_DIR):
+    if not _is_current(source, store_dir):
+        build_price_store(source, store_dir)
+    return PriceStore(store_dir)
+
+
+_default_store = None
+
+
+def get_prices(symbol, start=None, end=None):
+    global _default_store
+    if _default_store is None:
+        _default_store = open_store()
+    return _default_store.get_prices(symbol, start, end)
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the memory-mapped per-ticker price store")
+    parser.add_argument("symbol", nargs="?", default="AAPL")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.rebuild:
+        build_price_store()
+    store = open_store()
+    opened = time.perf_counter()
+
+    repeats = 10_000
+    for _ in range(repeats):
+        rows = store.get_prices(args.symbol, args.start, args.end)
+    lookup = (time.perf_counter() - opened) / repeats
+
+    print(f"Store with {len(store.records):,} rows for {len(store.symbols)} symbols opened in {opened - start:.2f}s")
+    print(f"get_prices('{args.symbol}'): {len(rows)} rows in {lookup * 1e6:.1f}us")
+    print(pd.DataFrame(rows).tail())
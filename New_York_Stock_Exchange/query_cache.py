@@ -0,0 +1,185 @@
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from store_in_sql_database import DB_PATH, db_generation
+
+QUERY_CACHE_DIR = os.path.join('.cache', 'queries')
+# Memory budget of the cached result frames
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Quoted strings and identifiers are kept verbatim; comments and runs of
+# whitespace outside them collapse to a single space
+_SQL_PARTS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|\[[^\]]*\])|((?:\s|--[^\n]*|/\*.*?\*/)+)""", re.S)
+
+
+def normalize_sql(sql):
+    return _SQL_PARTS.sub(lambda m: m.group(1) or ' ', sql).strip().rstrip(';').strip()
+
+
+def _params_key(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _db_id(db_path):
+    return hashlib.sha1(str(Path(db_path).resolve()).encode()).hexdigest()[:8]
+
+
+# Same database, statement text (up to comments/whitespace), parameters
+# and database generation give the same key
+def query_key(sql, params=None, db_path=DB_PATH, generation=None):
+    generation = db_generation(db_path) if generation is None else generation
+    payload = repr((normalize_sql(sql), _params_key(params)))
+    return f"{_db_id(db_path)}_{generation}_{hashlib.sha1(payload.encode()).hexdigest()[:20]}"
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# Result frames in least-recently-used order, bounded by their total
+# memory. With `persist_dir` every result is also pickled there, so other
+# processes (and later runs) reuse it; files of other database generations
+# are removed when the generation is checked.
+class QueryCache:
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, persist_dir=None):
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._generations = {}
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, f"{key}.pkl")
+
+    def get(self, key):
+        df = self.entries.get(key)
+        if df is not None:
+            self.entries.move_to_end(key)
+        elif self.persist_dir and os.path.exists(self._path(key)):
+            df = pd.read_pickle(self._path(key))
+            self._remember(key, df)
+        if df is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return df
+
+    def _remember(self, key, df):
+        size = _frame_bytes(df)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = df
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= _frame_bytes(evicted)
+
+    def put(self, key, df):
+        if key in self.entries:
+            self.bytes -= _frame_bytes(self.entries.pop(key))
+        self._remember(key, df)
+        if self.persist_dir:
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, self._path(key))
+
+    # Drop entries (and files) of any other generation of this database;
+    # the first check in a process also prunes files left by earlier runs
+    def check_generation(self, db_path, generation):
+        db = _db_id(db_path)
+        if self._generations.get(db) == generation:
+            return
+        current = f"{db}_{generation}_"
+        for key in [k for k in self.entries if k.startswith(f"{db}_") and not k.startswith(current)]:
+            self.bytes -= _frame_bytes(self.entries.pop(key))
+        if self.persist_dir:
+            for path in glob.glob(os.path.join(self.persist_dir, f"{db}_*.pkl")):
+                if not os.path.basename(path).startswith(current):
+                    os.remove(path)
+        self._generations[db] = generation
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        if self.persist_dir:
+            for path in glob.glob(os.path.join(self.persist_dir, "*.pkl")):
+                os.remove(path)
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+    # Result of `sql` from the cache, or from a read-only connection on a
+    # miss. `conn` lets callers that pool connections supply their own.
+    def read_sql(self, sql, params=None, db_path=DB_PATH, conn=None):
+        generation = db_generation(db_path)
+        self.check_generation(db_path, generation)
+        key = query_key(sql, params, db_path, generation)
+        df = self.get(key)
+        if df is None:
+            df = _read_sql(sql, params, db_path, conn)
+            self.put(key, df)
+        return df.copy()
+
+
+def _read_sql(sql, params, db_path, conn):
+    if conn is not None:
+        return pd.read_sql(sql, conn, params=params)
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        return pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+_default_cache = None
+
+
+# Module-level shortcut over a process-wide in-memory cache
+def read_sql(sql, params=None, db_path=DB_PATH):
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = QueryCache()
+    return _default_cache.read_sql(sql, params, db_path)
+
+
+def read_sql_file(path, params=None, db_path=DB_PATH, cache=None):
+    with open(path, encoding="utf-8") as f:
+        sql = f.read()
+    if cache is None:
+        return read_sql(sql, params, db_path)
+    return cache.read_sql(sql, params, db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run .sql files through the persistent query cache")
+    parser.add_argument("files", nargs="+", help="SQL files to run")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--cache-dir", default=QUERY_CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="empty the cache first")
+    args = parser.parse_args()
+
+    cache = QueryCache(persist_dir=args.cache_dir)
+    if args.clear:
+        cache.clear()
+    for path in args.files:
+        start = time.perf_counter()
+        result = read_sql_file(path, db_path=args.db, cache=cache)
+        print(f"{path}: {len(result)} rows in {time.perf_counter() - start:.4f}s")
+        print(result.head())
+    print(cache.stats())
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from query_cache import MAX_CACHE_BYTES, QueryCache, query_key
+from store_in_sql_database import DB_PATH, db_generation
+from test_the_queries import query_company, query_sector
+
+HOST = "127.0.0.1"
+PORT = 8765
+POOL_SIZE = 4
+PAGE_SIZE = 1_000
+MAX_PAGE_SIZE = 10_000
+
+# Endpoints: path -> (SQL, required parameters). Parameters are bound by
+# SQLite, never formatted into the SQL text.
+ENDPOINTS = {
+    "/company": (query_company, ("ticker",)),
+    "/sectors": (query_sector, ()),
+}
+
+
+# Read-only SQLite connections shared by the request handlers. Queries run
+# on a thread pool of the same size so the event loop never blocks.
+class ConnectionPool:
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sqlite")
+        self.idle = asyncio.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            self.idle.put_nowait(conn)
+
+    # Result frame of a query, run on a pooled connection
+    async def fetch(self, sql, params=()):
+        conn = await self.idle.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, _fetch, conn, sql, params)
+        finally:
+            self.idle.put_nowait(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+        self.executor.shutdown()
+
+
+def _fetch(conn, sql, params):
+    return pd.read_sql(sql, conn, params=params)
+
+
+# Results are cached per database generation (see query_cache), so a
+# reload of the database is picked up on the next request
+class QueryService:
+    def __init__(self, db_path=DB_PATH, pool_size=POOL_SIZE, cache_bytes=MAX_CACHE_BYTES, cache_dir=None):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.cache = QueryCache(cache_bytes, cache_dir)
+        # Concurrent requests for the same uncached result share one query
+        self.inflight = {}
+
+    # The endpoint's SQL and its bound parameters
+    def _bind(self, path, params):
+        sql, required = ENDPOINTS[path]
+        missing = [name for name in required if not params.get(name)]
+        if missing:
+            raise ValueError(f"Missing parameter(s): {', '.join(missing)}")
+        return sql, {name: params[name] for name in required}
+
+    # The full result of an endpoint
+    async def run(self, path, params):
+        return await self._query(*self._bind(path, params))
+
+    async def _query(self, sql, bound):
+        generation = db_generation(self.db_path)
+        self.cache.check_generation(self.db_path, generation)
+        key = query_key(sql, bound, self.db_path, generation)
+
+        result = self.cache.get(key)
+        if result is not None:
+            return result, True
+        if key not in self.inflight:
+            self.inflight[key] = asyncio.ensure_future(self.pool.fetch(sql, bound))
+        try:
+            result = await asyncio.shield(self.inflight[key])
+        finally:
+            self.inflight.pop(key, None)
+        self.cache.put(key, result)
+        return result, False
+
+    # One page of the result; `next_page` is None on the last page. The page
+    # and the row count are queried (and cached) separately with LIMIT/OFFSET,
+    # so a result too big for the cache is never fetched whole.
+    async def page(self, path, params):
+        page = int(params.get("page", 1))
+        page_size = min(int(params.get("page_size", PAGE_SIZE)), MAX_PAGE_SIZE)
+        if page < 1 or page_size < 1:
+            raise ValueError("page and page_size must be positive")
+        sql, bound = self._bind(path, params)
+        start = (page - 1) * page_size
+        inner = sql.strip().rstrip(";")
+        (result, cached), (count, _) = await asyncio.gather(
+            self._query(f"SELECT * FROM (\n{inner}\n) LIMIT :page_limit OFFSET :page_offset",
+                        {**bound, "page_limit": page_size, "page_offset": start}),
+            self._query(f"SELECT COUNT(*) AS total_rows FROM (\n{inner}\n)", bound))
+        total_rows = int(count.iloc[0, 0])
+        rows = result.astype(object)
+        return {
+            "columns": list(result.columns),
+            "rows": rows.where(rows.notna(), None).values.tolist(),
+            "page": page,
+            "page_size": page_size,
+            "total_rows": total_rows,
+            "next_page": page + 1 if start + page_size < total_rows else None,
+            "cached": cached,
+        }
+
+    def stats(self):
+        return {**{f"cache_{k}": v for k, v in self.cache.stats().items()}, "pool_size": self.pool.size}
+
+    # Minimal HTTP/1.1 GET handler with keep-alive; every response is JSON
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                status, body = await self._respond(method, target)
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target):
+        if method != "GET":
+            return "405 Method Not Allowed", {"error": "only GET is supported"}
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if path == "/stats":
+            return "200 OK", self.stats()
+        if path not in ENDPOINTS:
+            return "404 Not Found", {"error": f"unknown endpoint '{path}'", "endpoints": list(ENDPOINTS)}
+        try:
+            return "200 OK", await self.page(path, params)
+        except ValueError as e:
+            return "400 Bad Request", {"error": str(e)}
+        # Anything else still gets a response rather than a dropped connection
+        except Exception as e:
+            return "500 Internal Server Error", {"error": f"{type(e).__name__}: {e}"}
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def main(args):
+    service = QueryService(args.db, args.pool_size, args.cache_mb * 1024 * 1024, args.cache_dir)
+    print(f"Serving {args.db} read-only on http://{args.host}:{args.port} ({', '.join(ENDPOINTS)}, /stats)")
+    try:
+        await service.serve(args.host, args.port)
+    finally:
+        service.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the finance database queries over HTTP/JSON")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--cache-mb", type=int, default=MAX_CACHE_BYTES // (1024 * 1024))
+    parser.add_argument("--cache-dir", default=None, help="also keep cached results on disk here")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
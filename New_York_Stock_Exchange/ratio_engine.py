@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+# Registry of named ratios. A simple ratio is a weighted sum of columns over a
+# denominator column; a composite ratio (Altman Z) is a weighted sum of other
+# registered ratios.
+# Note fundamentals.csv ships its own 'Current Ratio' and 'Gross Margin'
+# columns (in percent); add_ratios leaves such columns alone by default.
+RATIOS = {}
+COMPOSITES = {}
+
+
+def register_ratio(name, numerator, denominator, fill_zero=False):
+    # numerator: a column name or a list of (weight, column) pairs;
+    # fill_zero: missing numerator values count as zero
+    if isinstance(numerator, str):
+        numerator = [(1.0, numerator)]
+    RATIOS[name] = (tuple(numerator), denominator, fill_zero)
+
+
+def register_composite(name, components):
+    # components: list of (weight, ratio name)
+    COMPOSITES[name] = tuple(components)
+
+
+# Profitability
+register_ratio('Net Margin', 'Net Income', 'Total Revenue')
+# Gross Margin is taken from revenue and cost of revenue: some filers
+# (banks, card issuers) report Gross Profit as 0. The reported-gross-profit
+# version is kept under its own name.
+register_ratio('Gross Margin', [(1.0, 'Total Revenue'), (-1.0, 'Cost of Revenue')], 'Total Revenue')
+register_ratio('Gross Profit Margin', 'Gross Profit', 'Total Revenue')
+register_ratio('Operating Margin', 'Operating Income', 'Total Revenue')
+register_ratio('ROE', 'Net Income', 'Total Equity')
+
+# Liquidity
+register_ratio('Current Ratio', 'Total Current Assets', 'Total Current Liabilities')
+register_ratio('Quick Ratio', [(1.0, 'Total Current Assets'), (-1.0, 'Inventory')], 'Total Current Liabilities')
+
+# Leverage. Debt-to-Equity uses Long-Term Debt; the broader Total Liabilities
+# version is kept under its own name so the two are never mixed up.
+register_ratio('Debt-to-Equity', 'Long-Term Debt', 'Total Equity')
+register_ratio('Liabilities-to-Equity', 'Total Liabilities', 'Total Equity')
+register_ratio('Debt Ratio', 'Total Liabilities', 'Total Assets')
+register_ratio('Interest Coverage', 'Earnings Before Interest and Tax', 'Interest Expense')
+
+# Efficiency
+register_ratio('Asset Turnover', 'Total Revenue', 'Total Assets')
+register_ratio('Inventory Turnover', 'Cost of Revenue', 'Inventory')
+
+# Altman Z-Score components and the score itself
+register_ratio('Working Capital to Assets', [(1.0, 'Total Current Assets'), (-1.0, 'Total Current Liabilities')], 'Total Assets')
+register_ratio('Retained Earnings to Assets', 'Retained Earnings', 'Total Assets', fill_zero=True)
+register_ratio('EBIT to Assets', 'Earnings Before Interest and Tax', 'Total Assets')
+register_ratio('Equity to Liabilities', 'Total Equity', 'Total Liabilities')
+register_composite('Altman_Z', [
+    (1.2, 'Working Capital to Assets'),
+    (1.4, 'Retained Earnings to Assets'),
+    (3.3, 'EBIT to Assets'),
+    (0.6, 'Equity to Liabilities'),
+    (1.0, 'Asset Turnover'),
+])
+
+
+# Division that returns NaN instead of inf when the denominator is zero
+def safe_divide(a, b):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return np.divide(a, b, out=np.full(np.broadcast(a, b).shape, np.nan), where=b != 0)
+
+
+def _simple_ratios(names):
+    needed = []
+    for name in names:
+        if name in COMPOSITES:
+            needed.extend(r for _, r in COMPOSITES[name])
+        elif name in RATIOS:
+            needed.append(name)
+        else:
+            raise KeyError(f"Unknown ratio '{name}'. Registered: {', '.join(list(RATIOS) + list(COMPOSITES))}")
+    return list(dict.fromkeys(needed))
+
+
+# Evaluate the requested ratios in one pass: the needed columns are pulled
+# into a single float64 block, each distinct denominator is inverted once,
+# and the results land in a float32 matrix of shape (rows, len(names)).
+def ratio_matrix(df, names=None):
+    names = list(RATIOS) + list(COMPOSITES) if names is None else list(names)
+    simple = _simple_ratios(names)
+
+    columns = []
+    for name in simple:
+        numerator, denominator, _ = RATIOS[name]
+        columns.extend(col for _, col in numerator)
+        columns.append(denominator)
+    columns = list(dict.fromkeys(columns))
+    position = {col: i for i, col in enumerate(columns)}
+    block = df[columns].to_numpy(dtype=np.float64)
+
+    reciprocals = {}
+    for name in simple:
+        denominator = RATIOS[name][1]
+        if denominator not in reciprocals:
+            reciprocals[denominator] = safe_divide(1.0, block[:, position[denominator]])
+
+    values = {}
+    for name in simple:
+        numerator, denominator, fill_zero = RATIOS[name]
+        total = np.zeros(len(df))
+        for weight, col in numerator:
+            column = block[:, position[col]]
+            total += weight * (np.nan_to_num(column, nan=0.0) if fill_zero else column)
+        values[name] = total * reciprocals[denominator]
+
+    out = np.empty((len(df), len(names)), dtype=np.float32)
+    for j, name in enumerate(names):
+        if name in COMPOSITES:
+            weight, ratio = COMPOSITES[name][0]
+            total = weight * values[ratio]
+            for weight, ratio in COMPOSITES[name][1:]:
+                total += weight * values[ratio]
+            out[:, j] = total
+        else:
+            out[:, j] = values[name]
+    return out, names
+
+
+# With keep_existing=True a ratio df already has as a column is taken from
+# df as it is instead of being computed
+def compute_ratios(df, names=None, keep_existing=False):
+    names = list(RATIOS) + list(COMPOSITES) if names is None else list(names)
+    existing = [name for name in names if name in df.columns] if keep_existing else []
+    matrix, computed = ratio_matrix(df, [name for name in names if name not in existing])
+    ratios = pd.DataFrame(matrix, index=df.index, columns=computed)
+    for name in existing:
+        ratios[name] = df[name].astype(np.float32)
+    return ratios[names]
+
+
+# Return a copy of df with the requested ratios attached as columns.
+# `rename` maps registry names to the column names a script expects.
+# Columns df already has are kept unless overwrite=True.
+def add_ratios(df, names, rename=None, overwrite=False):
+    rename = rename or {}
+    if not overwrite:
+        names = [name for name in names if rename.get(name, name) not in df.columns]
+    ratios = compute_ratios(df, names).rename(columns=rename)
+    df = df.copy()
+    for col in ratios.columns:
+        df[col] = ratios[col]
+    return df
+
+
+if __name__ == "__main__":
+    fundamentals = pd.read_csv('fundamentals.csv')
+    ratios = compute_ratios(fundamentals)
+    print(ratios.describe().T[['count', 'mean', '50%']])
+    print(f"Ratio matrix: {ratios.shape}, {ratios.memory_usage(index=False).sum() / 1024:.1f} KiB")
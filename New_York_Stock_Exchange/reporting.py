@@ -0,0 +1,128 @@
+import hashlib
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import matplotlib
+
+# Charts are only ever written to files; Agg never opens a window, so batch
+# runs cannot block on a GUI
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from instrumentation import stage  # noqa: E402
+from module_deps import hash_module_sources  # noqa: E402
+
+FIGURE_CACHE_DIR = os.path.join('.cache', 'figures')
+# Scatter plots above this many points are drawn from a sample
+MAX_SCATTER_POINTS = 5_000
+
+
+# One chart to write: `func(data, **options)` draws onto a fresh figure and
+# reporting saves it to `path`. `func` must be a module-level function so it
+# can be sent to a worker process.
+@dataclass(frozen=True)
+class Chart:
+    path: str
+    func: object
+    data: object
+    options: dict = field(default_factory=dict)
+    savefig: dict = field(default_factory=dict)
+
+
+# Sample at most max_points rows for a scatter plot; with `stratify` each
+# group keeps its share of the points, so small groups stay visible
+def downsample(df, max_points=MAX_SCATTER_POINTS, stratify=None, random_state=42):
+    if len(df) <= max_points:
+        return df
+    if stratify is None:
+        return df.sample(n=max_points, random_state=random_state)
+    # Shuffle once, then keep the first share of rows of every group
+    shuffled = df.sample(frac=1.0, random_state=random_state)
+    groups = shuffled.groupby(stratify, observed=True)
+    quota = np.maximum(1, np.round(groups[stratify].transform('size') * max_points / len(df)))
+    return shuffled[groups.cumcount() < quota].sort_index()
+
+
+def _data_hash(data, h):
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        columns = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+        h.update(repr([str(c) for c in columns]).encode())
+        h.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    elif isinstance(data, dict):
+        for key in sorted(data):
+            h.update(str(key).encode())
+            _data_hash(data[key], h)
+    else:
+        h.update(repr(data).encode())
+
+
+# The cached figure is reused while the data, the drawing code (the plot
+# function's module and the project modules it imports) and its options are
+# unchanged
+def chart_key(chart):
+    h = hashlib.sha1()
+    h.update(f"{chart.func.__module__}.{chart.func.__qualname__}".encode())
+    hash_module_sources(chart.func.__module__, h)
+    h.update(repr(sorted(chart.options.items())).encode())
+    h.update(repr(sorted(chart.savefig.items())).encode())
+    _data_hash(chart.data, h)
+    return h.hexdigest()[:16]
+
+
+def save_figure(path, **savefig):
+    plt.savefig(path, **savefig)
+    plt.close('all')
+
+
+def _render(chart, cache_path):
+    matplotlib.use('Agg')
+    chart.func(chart.data, **chart.options)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp{os.path.splitext(cache_path)[1]}"
+    save_figure(tmp_path, **chart.savefig)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+# Render charts on a process pool (or serially with max_workers=1), reusing
+# cached images for charts whose inputs have not changed. Returns
+# {path: 'cached' | 'rendered'}.
+def render_charts(charts, max_workers=None, cache_dir=FIGURE_CACHE_DIR, force=False):
+    os.makedirs(cache_dir, exist_ok=True)
+    status, cached_paths, pending = {}, [], []
+    for chart in charts:
+        name, ext = os.path.splitext(os.path.basename(chart.path))
+        cache_path = os.path.join(cache_dir, f"{name}-{chart_key(chart)}{ext or '.png'}")
+        cached_paths.append(cache_path)
+        if not force and os.path.exists(cache_path):
+            status[chart.path] = 'cached'
+        else:
+            pending.append((chart, cache_path))
+            status[chart.path] = 'rendered'
+
+    with stage("chart rendering", rows_in=len(pending)):
+        if max_workers == 1 or len(pending) <= 1:
+            for chart, cache_path in pending:
+                _render(chart, cache_path)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                list(pool.map(_render, *zip(*pending)))
+
+    for chart, cache_path in zip(charts, cached_paths):
+        shutil.copyfile(cache_path, chart.path)
+        _prune(cache_dir, cache_path)
+    return status
+
+
+# Drop the older renders of the same chart
+def _prune(cache_dir, cache_path):
+    name, ext = os.path.basename(cache_path).rsplit("-", 1)
+    older = re.compile(re.escape(name) + r"-[0-9a-f]{16}" + re.escape(os.path.splitext(ext)[1]) + "$")
+    for fname in os.listdir(cache_dir):
+        if older.match(fname) and os.path.join(cache_dir, fname) != cache_path:
+            os.remove(os.path.join(cache_dir, fname))
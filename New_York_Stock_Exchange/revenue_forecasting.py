@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 import matplotlib.pyplot as plt
+from reporting import save_figure
 
 # Load your revenue forecast data
 try:
@@ -63,8 +64,7 @@ try:
     plt.legend()
     
     plt.tight_layout()
-    plt.savefig('financial_forecasts.png', bbox_inches='tight')
-    plt.show()
+    save_figure('financial_forecasts.png', bbox_inches='tight')
     
     # Print key results
     print("\nKey Financial Metrics:")
@@ -0,0 +1,158 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from growth_engine import load_growth
+from ratio_engine import COMPOSITES, RATIOS, compute_ratios
+
+# Registry of risk flags: a metric (registered ratio, growth metric or raw
+# column), a comparison and a default threshold. NaN metrics never flag.
+FLAGS = {}
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+# Growth metrics and the growth engine measure they are read from
+GROWTH_METRICS = {'Revenue Growth': 'Total Revenue PoP', 'Inventory Growth': 'Inventory PoP'}
+
+
+def register_flag(name, metric, op, threshold):
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown operator '{op}'. Expected one of: {', '.join(OPERATORS)}")
+    FLAGS[name] = (metric, op, threshold)
+
+
+# Financial distress
+register_flag('altman_distress', 'Altman_Z', '<', 1.8)
+register_flag('high_leverage', 'Debt-to-Equity', '>', 2)
+register_flag('low_interest_coverage', 'Interest Coverage', '<', 2)
+
+# Operational
+register_flag('inventory_buildup', 'Inventory Growth', '>', 0.3)
+register_flag('weak_revenue_growth', 'Revenue Growth', '<', 0.1)
+register_flag('profitable', 'Net Income', '>', 0)
+register_flag('negative_operating_cash_flow', 'Net Cash Flow-Operating', '<', 0)
+
+
+# Flag expressions. Flag('high_leverage') uses the precomputed bitmap,
+# Flag('high_leverage', 3) re-thresholds the stored metric; combine them
+# with & (AND), | (OR) and ~ (NOT).
+class _Expr:
+    def __and__(self, other):
+        return _Combine(np.bitwise_and, self, _as_expr(other))
+
+    def __or__(self, other):
+        return _Combine(np.bitwise_or, self, _as_expr(other))
+
+    def __invert__(self):
+        return _Not(self)
+
+
+class Flag(_Expr):
+    def __init__(self, name, threshold=None):
+        if name not in FLAGS:
+            raise KeyError(f"Unknown flag '{name}'. Registered: {', '.join(FLAGS)}")
+        self.name = name
+        self.threshold = threshold
+
+    def bits(self, screen):
+        if self.threshold is None:
+            return screen.bitmaps[self.name]
+        metric, op, _ = FLAGS[self.name]
+        return screen._pack(OPERATORS[op](screen.metrics[metric], self.threshold))
+
+
+class _Combine(_Expr):
+    def __init__(self, func, left, right):
+        self.func, self.left, self.right = func, left, right
+
+    def bits(self, screen):
+        return self.func(self.left.bits(screen), self.right.bits(screen))
+
+
+class _Not(_Expr):
+    def __init__(self, expr):
+        self.expr = expr
+
+    def bits(self, screen):
+        return np.invert(self.expr.bits(screen))
+
+
+def _as_expr(expr):
+    return Flag(expr) if isinstance(expr, str) else expr
+
+
+# The risk groups the scripts report on
+DEBT_RISK = Flag('high_leverage') | Flag('low_interest_coverage')
+INVENTORY_RISK = Flag('inventory_buildup') & Flag('weak_revenue_growth')
+CASH_FLOW_ISSUE = Flag('profitable') & Flag('negative_operating_cash_flow')
+
+
+# Every registered flag evaluated once over the fundamentals rows and kept
+# as a packed bitmap (one bit per row). Queries combine bitmaps with bitwise
+# operations and only unpack the final result.
+class RiskScreen:
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+
+        needed = list(dict.fromkeys(metric for metric, _, _ in FLAGS.values()))
+        ratios = [m for m in needed if m in RATIOS or m in COMPOSITES]
+        self.metrics = {name: col.to_numpy(dtype=np.float64) for name, col in compute_ratios(df, ratios).items()}
+        growth_needed = [GROWTH_METRICS[m] for m in needed if m in GROWTH_METRICS]
+        growth = load_growth(df, extra=[name.rsplit(' ', 1)[0] for name in growth_needed]) if growth_needed else None
+        for metric in needed:
+            if metric in GROWTH_METRICS:
+                self.metrics[metric] = growth[GROWTH_METRICS[metric]].to_numpy(dtype=np.float64)
+            elif metric not in self.metrics:
+                self.metrics[metric] = df[metric].to_numpy(dtype=np.float64)
+
+        self.bitmaps = {}
+        for name, (metric, op, threshold) in FLAGS.items():
+            with np.errstate(invalid='ignore'):
+                self.bitmaps[name] = self._pack(OPERATORS[op](self.metrics[metric], threshold))
+
+    def _pack(self, mask):
+        return np.packbits(np.asarray(mask, dtype=bool))
+
+    def mask(self, expr):
+        with np.errstate(invalid='ignore'):
+            bits = _as_expr(expr).bits(self)
+        return np.unpackbits(bits, count=self.n).astype(bool)
+
+    # Row positions matching the expression
+    def rows(self, expr):
+        return np.flatnonzero(self.mask(expr))
+
+    def count(self, expr):
+        return int(self.mask(expr).sum())
+
+    # Matching rows restricted to `columns` (default: all of the frame's
+    # columns); screen metrics such as 'Altman_Z' or 'Inventory Growth' can
+    # be requested alongside the frame's own columns
+    def view(self, expr, columns=None):
+        columns = list(self.df.columns) if columns is None else list(columns)
+        rows = self.rows(expr)
+        own = [c for c in columns if c in self.df.columns]
+        result = self.df.iloc[rows][own]
+        for col in columns:
+            if col not in self.df.columns:
+                result[col] = self.metrics[col][rows]
+        return result[columns]
+
+    # Rows flagged by each registered flag
+    def summary(self):
+        return pd.Series({name: self.count(name) for name in FLAGS}, name='Flagged Rows')
+
+
+if __name__ == "__main__":
+    import time
+    from schema import read_merged
+
+    fundamentals_merged = read_merged()
+    start = time.perf_counter()
+    screen = RiskScreen(fundamentals_merged)
+    built = time.perf_counter()
+    rows = screen.rows(Flag('altman_distress') & ~Flag('high_leverage', 3) | CASH_FLOW_ISSUE)
+    queried = time.perf_counter()
+
+    print(screen.summary())
+    print(f"Built {len(FLAGS)} bitmaps in {built - start:.4f}s; combined query matched {len(rows)} rows in {queried - built:.6f}s")
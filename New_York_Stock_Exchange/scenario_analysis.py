@@ -1,31 +1,30 @@
 import pandas as pd
+from csv_cache import read_table
+from scenario_engine import company_baselines, run_scenarios
 
-fixed_costs = 120000  # Example fixed operating costs
-avg_cogs_ratio = 0.65  # Example: 65% average cost of goods sold ratio
-contribution_margin = 1 - avg_cogs_ratio
-break_even = fixed_costs / contribution_margin
-print(f"Break-even revenue: ${break_even:,.2f}")
+# Every company's latest revenue, COGS ratio, fixed costs (SG&A + R&D) and debt
+fundamentals = read_table("fundamentals")
+baselines = company_baselines(fundamentals)
 
-# Test impact of 10% cost increase
-rev_scenarios = [500000, 550000, 600000]
-cost_increase = 1.10  # 10% higher COGS
+# Shock grid: revenue x COGS ratio x fixed costs x interest rate on debt
+results = run_scenarios(
+    baselines,
+    revenue_shocks=[0.9, 1.0, 1.1],
+    cogs_shocks=[1.0, 1.10],  # 10% higher COGS
+    fixed_cost_shocks=[1.0, 1.10],
+    interest_rates=[0.03, 0.05, 0.07]
+)
 
-results = []
-for rev in rev_scenarios:
-    original_profit = rev * (1 - avg_cogs_ratio) - fixed_costs
-    new_profit = rev * (1 - avg_cogs_ratio * cost_increase) - fixed_costs
-    results.append({
-        'Revenue': rev,
-        'Original Profit': original_profit,
-        'New Profit': new_profit,
-        'Impact': new_profit - original_profit
-    })
+df = results.to_frame()
 
-# Display results
-df = pd.DataFrame(results)
-df['Impact'] = df['Impact'].apply(lambda x: f"${x:,.2f}")
-print(df)
+# Break-even revenue at current costs and a 5% rate
+current = df[(df['Revenue Shock'] == 1.0) & (df['COGS Shock'] == 1.0) &
+             (df['Fixed Cost Shock'] == 1.0) & (df['Interest Rate'] == 0.05)]
+print(current[['Ticker Symbol', 'Break-even Revenue', 'Profit']].head())
+
+# Profit impact of revenue and COGS shocks (median across companies)
+print(df.groupby(['Revenue Shock', 'COGS Shock'])['Profit Impact'].median())
 
 # Save results to CSV
 df.to_csv('scenario_analysis_results.csv', index=False)
-print("Scenario analysis results saved to 'scenario_analysis_results.csv'")
\ No newline at end of file
+print("Scenario analysis results saved to 'scenario_analysis_results.csv'")
@@ -0,0 +1,116 @@
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Default shock grid. Revenue, COGS-ratio and fixed-cost shocks are
+# multiplicative; interest rates are absolute rates applied to total debt.
+REVENUE_SHOCKS = (0.8, 0.9, 1.0, 1.1)
+COGS_SHOCKS = (1.0, 1.05, 1.10)
+FIXED_COST_SHOCKS = (1.0, 1.10)
+INTEREST_RATES = (0.03, 0.05, 0.07)
+# Rate on debt in the unshocked baseline that Profit Impact is measured against
+BASE_RATE = 0.05
+# Upper bound on tensor elements computed in memory per company chunk
+MAX_CHUNK_ELEMENTS = 10_000_000
+
+FIXED_COST_COLUMNS = ['Sales, General and Admin.', 'Research and Development']
+DEBT_COLUMNS = ['Long-Term Debt', 'Short-Term Debt / Current Portion of Long-Term Debt']
+
+
+# Latest reported period per company, reduced to the inputs the scenarios need
+def company_baselines(fundamentals):
+    latest = fundamentals.sort_values('Period Ending').groupby('Ticker Symbol', observed=True).tail(1)
+    latest = latest.set_index(latest['Ticker Symbol'].astype(str)).sort_index()
+    revenue = latest['Total Revenue']
+    baselines = pd.DataFrame({
+        'Revenue': revenue,
+        'COGS Ratio': (latest['Cost of Revenue'] / revenue.where(revenue != 0)),
+        'Fixed Costs': latest[FIXED_COST_COLUMNS].fillna(0).sum(axis=1),
+        'Debt': latest[DEBT_COLUMNS].fillna(0).sum(axis=1),
+    })
+    baselines.index.name = 'Ticker Symbol'
+    return baselines.dropna(subset=['Revenue', 'COGS Ratio'])
+
+
+@dataclass
+class ScenarioResult:
+    tickers: pd.Index
+    revenue_shocks: np.ndarray
+    cogs_shocks: np.ndarray
+    fixed_cost_shocks: np.ndarray
+    interest_rates: np.ndarray
+    # (companies, revenue, cogs, fixed, rate)
+    profit: np.ndarray
+    profit_impact: np.ndarray
+    # (companies, cogs, fixed, rate); NaN where the contribution margin is <= 0
+    break_even: np.ndarray
+
+    # Long format: one row per company and grid cell
+    def to_frame(self):
+        grid = pd.MultiIndex.from_product(
+            [self.tickers, self.revenue_shocks, self.cogs_shocks, self.fixed_cost_shocks, self.interest_rates],
+            names=['Ticker Symbol', 'Revenue Shock', 'COGS Shock', 'Fixed Cost Shock', 'Interest Rate'])
+        break_even = np.broadcast_to(self.break_even[:, None], self.profit.shape)
+        return pd.DataFrame({
+            'Profit': np.asarray(self.profit).ravel(),
+            'Profit Impact': np.asarray(self.profit_impact).ravel(),
+            'Break-even Revenue': break_even.ravel(),
+        }, index=grid).reset_index()
+
+
+# In-memory array, or a .npy memmap in out_dir filled chunk by chunk
+def _allocate(out_dir, name, shape):
+    if out_dir is None:
+        return np.empty(shape, dtype=np.float64)
+    return np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode='w+', dtype=np.float64, shape=shape)
+
+
+def _evaluate(base, rev, cogs, fixed, rate, base_rate):
+    # Company axis first, then one axis per shock dimension
+    revenue = base['Revenue'][:, None, None, None, None] * rev[None, :, None, None, None]
+    cogs_ratio = base['COGS Ratio'][:, None, None, None, None] * cogs[None, None, :, None, None]
+    fixed_costs = base['Fixed Costs'][:, None, None, None, None] * fixed[None, None, None, :, None]
+    interest = base['Debt'][:, None, None, None, None] * rate[None, None, None, None, :]
+
+    margin = 1.0 - cogs_ratio
+    profit = revenue * margin - fixed_costs - interest
+    # Same formula with no shocks, so the unshocked cell has zero impact
+    baseline = base['Revenue'] * (1.0 - base['COGS Ratio']) - base['Fixed Costs'] - base['Debt'] * base_rate
+    impact = profit - baseline[:, None, None, None, None]
+    break_even = ((fixed_costs + interest) / np.where(margin > 0, margin, np.nan))[:, 0]
+    return profit, impact, break_even
+
+
+# Evaluate the full Cartesian shock grid against every company with NumPy
+# broadcasting. Companies are processed in chunks of at most
+# `max_elements` grid cells; with `out_dir` the tensors are written to .npy
+# memmaps chunk by chunk instead of being held in memory.
+def run_scenarios(baselines, revenue_shocks=REVENUE_SHOCKS, cogs_shocks=COGS_SHOCKS,
+                  fixed_cost_shocks=FIXED_COST_SHOCKS, interest_rates=INTEREST_RATES,
+                  base_rate=BASE_RATE, out_dir=None, max_elements=MAX_CHUNK_ELEMENTS):
+    axes = [np.asarray(a, dtype=np.float64) for a in (revenue_shocks, cogs_shocks, fixed_cost_shocks, interest_rates)]
+    n = len(baselines)
+    shape = (n,) + tuple(len(a) for a in axes)
+    be_shape = (n,) + shape[2:]
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    profit = _allocate(out_dir, 'profit', shape)
+    impact = _allocate(out_dir, 'profit_impact', shape)
+    break_even = _allocate(out_dir, 'break_even', be_shape)
+
+    columns = {col: baselines[col].to_numpy(dtype=np.float64) for col in baselines.columns}
+    chunk = max(1, max_elements // max(1, int(np.prod(shape[1:]))))
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        base = {col: values[start:stop] for col, values in columns.items()}
+        profit[start:stop], impact[start:stop], break_even[start:stop] = _evaluate(base, *axes, base_rate)
+
+    if out_dir is not None:
+        for array in (profit, impact, break_even):
+            array.flush()
+        pd.Series(baselines.index, name='Ticker Symbol').to_csv(os.path.join(out_dir, 'tickers.csv'), index=False)
+
+    return ScenarioResult(baselines.index, *axes, profit, impact, break_even)
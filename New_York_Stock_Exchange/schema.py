@@ -0,0 +1,85 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+MERGED_PATH = 'merged_fundamentals_securities.csv'
+
+# String columns repeated on every fundamentals row of a company
+CATEGORICAL_COLUMNS = [
+    'Ticker Symbol', 'Security', 'SEC filings', 'GICS Sector',
+    'GICS Sub Industry', 'Address of Headquarters',
+]
+DATE_COLUMNS = ['Period Ending', 'Date first added']
+# The securities join key duplicates 'Ticker Symbol' after the merge
+DROP_COLUMNS = ['Ticker symbol']
+# Other string columns become categorical when at most this share of values is distinct
+CATEGORY_MAX_UNIQUE = 0.5
+
+
+# Narrowest dtype that holds every value exactly: integer columns take the
+# smallest fitting integer type, float64 columns become float32 only when
+# every value survives the round trip. Floats are never turned into
+# integers, so later arithmetic on them cannot overflow.
+def downcast_lossless(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == np.float64:
+        values = series.to_numpy()
+        as_float32 = values.astype(np.float32)
+        same = (as_float32.astype(np.float64) == values) | (np.isnan(values) & np.isnan(as_float32))
+        if same.all():
+            return series.astype(np.float32)
+    return series
+
+
+# Compact dtypes for the merged fundamentals frame and everything derived
+# from it: categoricals for repeated strings, parsed dates, lossless numeric
+# downcasts, and the redundant 'Ticker symbol' join column removed
+def apply_schema(df):
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in DATE_COLUMNS:
+            columns[col] = pd.to_datetime(series, errors='coerce')
+        elif col in CATEGORICAL_COLUMNS or (
+                series.dtype == object and series.nunique() <= CATEGORY_MAX_UNIQUE * len(series)):
+            columns[col] = series.astype('category')
+        else:
+            columns[col] = downcast_lossless(series)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def read_merged(path=MERGED_PATH):
+    return apply_schema(pd.read_csv(path))
+
+
+# Per-column memory before and after, largest savings first
+def memory_report(before, after):
+    report = pd.DataFrame({
+        'before_dtype': before.dtypes.astype(str),
+        'before_bytes': before.memory_usage(index=False, deep=True),
+    }).join(pd.DataFrame({
+        'after_dtype': after.dtypes.astype(str),
+        'after_bytes': after.memory_usage(index=False, deep=True),
+    }), how='left')
+    report['after_bytes'] = report['after_bytes'].fillna(0).astype(np.int64)
+    report['saved_bytes'] = report['before_bytes'] - report['after_bytes']
+    return report.sort_values('saved_bytes', ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory saved by the compact fundamentals schema")
+    parser.add_argument("path", nargs="?", default=MERGED_PATH)
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.path)
+    compact = apply_schema(raw)
+    report = memory_report(raw, compact)
+
+    before, after = report['before_bytes'].sum(), report['after_bytes'].sum()
+    print(report.head(15))
+    print(f"{args.path}: {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB ({after / before:.0%} of the original)")
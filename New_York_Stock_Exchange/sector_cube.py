@@ -0,0 +1,247 @@
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from ratio_engine import COMPOSITES, RATIOS, compute_ratios
+
+CUBE_PATH = os.path.join('.cache', 'sector_cube.pkl')
+DIMENSIONS = ['GICS Sector', 'GICS Sub Industry', 'Fiscal Year']
+SUM_COLUMNS = ['Total Revenue', 'Net Income', 'Total Assets']
+# Relative accuracy of the quantile sketch: every quantile is returned
+# within 1% of a value that is actually in the cell
+SKETCH_ACCURACY = 0.01
+# Values this close to zero share a single bucket
+SKETCH_MIN_VALUE = 1e-9
+
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+
+
+# Log-spaced bucket per value (DDSketch style): the sign plus the bucket
+# number k with gamma^(k-1) < |v| <= gamma^k. Bucket counts simply add up,
+# so sketches of different cells and batches merge exactly.
+def _buckets(values):
+    sign = np.sign(values).astype(np.int8)
+    sign[np.abs(values) < SKETCH_MIN_VALUE] = 0
+    magnitude = np.maximum(np.abs(values), SKETCH_MIN_VALUE)
+    return sign, np.ceil(np.log(magnitude) / _LOG_GAMMA).astype(np.int32)
+
+
+def _bucket_values(sign, bucket):
+    return sign * 2.0 * np.power(_GAMMA, bucket.astype(np.float64)) / (_GAMMA + 1.0)
+
+
+def _cell_keys(df):
+    year = df['For Year'] if 'For Year' in df.columns else pd.Series(np.nan, index=df.index)
+    year = year.fillna(pd.to_datetime(df['Period Ending'], errors='coerce').dt.year)
+    return pd.DataFrame({
+        'GICS Sector': df['GICS Sector'].astype(str).where(df['GICS Sector'].notna(), 'Unknown'),
+        'GICS Sub Industry': df['GICS Sub Industry'].astype(str).where(df['GICS Sub Industry'].notna(), 'Unknown'),
+        'Fiscal Year': year.fillna(-1).astype(np.int32),
+    }, index=df.index)
+
+
+GROUP = DIMENSIONS + ['Metric']
+SKETCH_GROUP = GROUP + ['Sign', 'Bucket']
+
+
+def _row_keys(df):
+    return (df['Ticker Symbol'].astype(str) + '|' + pd.to_datetime(df['Period Ending']).astype(str)).to_numpy()
+
+
+def _aggregate(long):
+    stats = long.groupby(GROUP, observed=True)['Value'].agg(['sum', 'count', 'min', 'max'])
+    sign, bucket = _buckets(long['Value'].to_numpy())
+    sketch = long[GROUP].assign(Sign=sign, Bucket=bucket).groupby(SKETCH_GROUP).size()
+    return stats, sketch
+
+
+def _in_cells(index, cells):
+    return pd.MultiIndex.from_frame(index.to_frame(index=False)[DIMENSIONS]).isin(cells)
+
+
+# Materialized aggregates per (sector, sub-industry, fiscal year) cell:
+# sum/count/min/max and a mergeable quantile sketch for every registered
+# ratio and a few raw columns. The per-row metric values are kept as well,
+# keyed by (ticker, period end) with a content hash: new rows are folded in
+# incrementally, while a restated or removed row rebuilds the cells it
+# touched from the stored values, so the cube never drifts from the source.
+class SectorCube:
+    def __init__(self, metrics=None):
+        self.metrics = list(metrics) if metrics is not None else list(RATIOS) + list(COMPOSITES) + SUM_COLUMNS
+        self.stats = None
+        self.sketch = None
+        self.values = None
+        # row key -> content hash
+        self.seen = {}
+
+    # Wide (cell keys + metric values) frame of the rows in df
+    def _wide(self, df):
+        ratios = [m for m in self.metrics if m in RATIOS or m in COMPOSITES]
+        raw = [m for m in self.metrics if m not in ratios]
+        values = pd.concat([compute_ratios(df, ratios).astype(np.float64), df[raw].astype(np.float64)], axis=1)
+        return pd.concat([_cell_keys(df), values], axis=1)
+
+    # Long (key, cell, metric, value) table of the finite values
+    def _long(self, wide, keys):
+        long = wide.assign(Key=keys).melt(id_vars=['Key'] + DIMENSIONS, var_name='Metric', value_name='Value')
+        return long[np.isfinite(long['Value'].to_numpy())]
+
+    def _fold(self, stats, sketch):
+        if self.stats is not None:
+            stats = pd.concat([self.stats, stats]).groupby(level=GROUP).agg(
+                {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'})
+            sketch = pd.concat([self.sketch, sketch]).groupby(level=SKETCH_GROUP).sum()
+        self.stats = stats.sort_index()
+        self.sketch = sketch.rename('count').sort_index()
+
+    # Recompute the given cells from the stored per-row values
+    def _rebuild_cells(self, cells):
+        if self.stats is not None:
+            self.stats = self.stats[~_in_cells(self.stats.index, cells)]
+            self.sketch = self.sketch[~_in_cells(self.sketch.index, cells)]
+        rows = self.values[pd.MultiIndex.from_frame(self.values[DIMENSIONS]).isin(cells)]
+        if len(rows):
+            self._fold(*_aggregate(rows))
+
+    def _cells_of(self, keys):
+        old = self.values[self.values['Key'].isin(keys)]
+        return pd.MultiIndex.from_frame(old[DIMENSIONS]).unique()
+
+    # Fold a batch of rows into the cube. Rows already in the cube with the
+    # same content are skipped; rows whose content changed replace the old
+    # version. Within the batch the last row of a key wins. Returns the
+    # number of new or restated rows.
+    def update(self, df):
+        keys = _row_keys(df)
+        last = ~pd.Index(keys).duplicated(keep='last')
+        df, keys = df[last], keys[last]
+        wide = self._wide(df)
+        hashes = pd.util.hash_pandas_object(wide, index=False).to_numpy()
+
+        stored = np.array([self.seen.get(key) for key in keys], dtype=object)
+        fresh = np.array([h is None for h in stored], dtype=bool)
+        restated = ~fresh & (stored != hashes)
+        changed = fresh | restated
+        if not changed.any():
+            return 0
+
+        dirty = pd.MultiIndex.from_tuples([], names=DIMENSIONS)
+        if restated.any():
+            restated_keys = keys[restated]
+            dirty = self._cells_of(restated_keys)
+            self.values = self.values[~self.values['Key'].isin(restated_keys)]
+
+        long = self._long(wide[changed], keys[changed])
+        self.values = long if self.values is None else pd.concat([self.values, long], ignore_index=True)
+        self.seen.update(zip(keys[changed], hashes[changed]))
+
+        if len(dirty):
+            # Restated rows may also move into cells that were clean
+            dirty = dirty.union(pd.MultiIndex.from_frame(long[DIMENSIONS]).unique())
+            self._rebuild_cells(dirty)
+        elif len(long):
+            self._fold(*_aggregate(long))
+        return int(changed.sum())
+
+    # Remove rows by key ('TICKER|YYYY-MM-DD'), rebuilding their cells
+    def remove(self, keys):
+        keys = [key for key in keys if key in self.seen]
+        if not keys:
+            return 0
+        dirty = self._cells_of(keys)
+        self.values = self.values[~self.values['Key'].isin(keys)]
+        for key in keys:
+            del self.seen[key]
+        self._rebuild_cells(dirty)
+        return len(keys)
+
+    # Make the cube match df exactly: fold new and restated rows, and
+    # remove rows that are no longer in df
+    def sync(self, df):
+        changed = self.update(df)
+        removed = self.remove(set(self.seen) - set(_row_keys(df)))
+        return changed, removed
+
+    # Approximate quantiles per group from the merged bucket counts
+    def _quantiles(self, by, quantiles):
+        sketch = self.sketch.reset_index()
+        sketch['Value'] = _bucket_values(sketch['Sign'].to_numpy(), sketch['Bucket'].to_numpy())
+        sketch = sketch.groupby(by + ['Metric', 'Value'], observed=True)['count'].sum().reset_index()
+
+        grouped = sketch.groupby(by + ['Metric'], sort=False)['count']
+        cumulative = grouped.cumsum()
+        total = grouped.transform('sum')
+        result = {}
+        for q in quantiles:
+            # First bucket whose cumulative count passes rank q * (n - 1)
+            hit = cumulative > q * (total - 1)
+            first = sketch[hit].groupby(by + ['Metric'], sort=False)['Value'].first()
+            result[f'q{int(round(q * 100))}'] = first
+        return pd.DataFrame(result)
+
+    # Roll the cells up to any subset of the dimensions, e.g. by=['GICS Sector']
+    # or by=['GICS Sector', 'Fiscal Year']; returns one row per (group, metric)
+    def rollup(self, by=('GICS Sector',), metrics=None, quantiles=(0.5,)):
+        if self.stats is None:
+            raise ValueError("SectorCube is empty")
+        by = list(by)
+        stats = self.stats.reset_index()
+        if metrics is not None:
+            stats = stats[stats['Metric'].isin(metrics)]
+        result = stats.groupby(by + ['Metric']).agg({'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'})
+        result['mean'] = result['sum'] / result['count']
+        if quantiles:
+            result = result.join(self._quantiles(by, quantiles))
+        return result
+
+    def save(self, path=CUBE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        state = {'metrics': self.metrics, 'stats': self.stats, 'sketch': self.sketch,
+                 'values': self.values, 'seen': self.seen}
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        cube = cls(state['metrics'])
+        cube.stats, cube.sketch, cube.values, cube.seen = state['stats'], state['sketch'], state['values'], state['seen']
+        return cube
+
+
+# Open the persisted cube and sync it with df, the full source: new and
+# restated rows are folded in and rows missing from df removed. A cube
+# built for a different set of metrics (or in an older format) is rebuilt
+# from scratch.
+def load_or_build(df, path=CUBE_PATH, rebuild=False):
+    cube = SectorCube()
+    if not rebuild and os.path.exists(path):
+        try:
+            stored = SectorCube.load(path)
+        except (KeyError, pickle.UnpicklingError, EOFError):
+            stored = None
+        if stored is not None and stored.metrics == cube.metrics:
+            cube = stored
+    if any(cube.sync(df)):
+        cube.save(path)
+    return cube
+
+
+if __name__ == "__main__":
+    from schema import read_merged
+
+    parser = argparse.ArgumentParser(description="Build or refresh the sector aggregate cube")
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    fundamentals_merged = read_merged()
+    cube = load_or_build(fundamentals_merged, rebuild=args.rebuild)
+    print(f"Cube holds {len(cube.seen)} rows across {len(cube.stats)} cell metrics")
+    print(cube.rollup(metrics=['Net Margin', 'ROE', 'Debt-to-Equity']).round(3))
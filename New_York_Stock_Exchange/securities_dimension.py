@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from csv_cache import read_table
+
+KEY = 'Ticker symbol'
+FACT_KEY = 'Ticker Symbol'
+# Attributes attached by attach_sectors; everything else is only
+# materialized by denormalize
+SECTOR_COLUMNS = ['GICS Sector', 'GICS Sub Industry']
+
+
+def normalize_tickers(tickers):
+    return pd.Series(tickers, copy=False).astype(str).str.strip().str.upper()
+
+
+# The securities table as a dimension keyed by ticker. Rows of a fact
+# table (fundamentals, prices) are resolved to dimension positions once
+# through a hash index; attributes are then gathered with a vectorized take
+# instead of a merge that copies every securities column onto every row.
+# Tickers are upper-cased on both sides, so every caller matches the same
+# way.
+class SecuritiesDimension:
+    def __init__(self, securities):
+        table = securities.copy()
+        table[KEY] = normalize_tickers(table[KEY]).to_numpy()
+        table = table.drop_duplicates(KEY, keep='first').reset_index(drop=True)
+        self.table = table
+        self.index = pd.Index(table[KEY])
+
+    def __len__(self):
+        return len(self.table)
+
+    # Dimension position of every ticker, -1 where the ticker is unknown.
+    # Categorical tickers are looked up once per category, not per row.
+    def positions(self, tickers):
+        if isinstance(tickers.dtype, pd.CategoricalDtype):
+            # Missing tickers have code -1, which picks the trailing -1
+            lookup = np.append(self.index.get_indexer(normalize_tickers(tickers.cat.categories)), -1)
+            return lookup[tickers.cat.codes.to_numpy()].astype(np.int32)
+        return self.index.get_indexer(normalize_tickers(tickers)).astype(np.int32)
+
+    def _take(self, column, pos):
+        return self.table[column].array.take(pos, allow_fill=True)
+
+    # Sector and sub-industry as categoricals: integer codes gathered from
+    # the dimension, sharing its categories
+    def attach_sectors(self, df, ticker_col=FACT_KEY, columns=SECTOR_COLUMNS):
+        pos = self.positions(df[ticker_col])
+        df = df.copy()
+        for col in columns:
+            values = self.table[col].astype('category').array
+            codes = np.where(pos >= 0, values.codes[np.maximum(pos, 0)], -1)
+            df[col] = pd.Categorical.from_codes(codes, dtype=values.dtype)
+        return df
+
+    # The wide frame a left merge on the ticker would give, without the
+    # duplicate key column; `columns` limits which attributes are attached
+    def denormalize(self, df, ticker_col=FACT_KEY, columns=None):
+        columns = [c for c in self.table.columns if c != KEY] if columns is None else list(columns)
+        pos = self.positions(df[ticker_col])
+        attributes = pd.DataFrame({col: self._take(col, pos) for col in columns}, index=df.index)
+        return pd.concat([df, attributes], axis=1)
+
+    # The dimension table itself, optionally restricted to some attributes
+    def frame(self, columns=None):
+        if columns is None:
+            return self.table.copy()
+        return self.table[[KEY] + [c for c in columns if c != KEY]].copy()
+
+
+_dimension = None
+
+
+# Process-wide dimension over the cached securities table
+def securities_dimension():
+    global _dimension
+    if _dimension is None:
+        _dimension = SecuritiesDimension(read_table("securities"))
+    return _dimension
+
+
+if __name__ == "__main__":
+    import time
+
+    fundamentals = read_table("fundamentals")
+    dimension = securities_dimension()
+
+    start = time.perf_counter()
+    merged = pd.merge(fundamentals, dimension.frame(), left_on=FACT_KEY, right_on=KEY, how='left').drop(columns=[KEY])
+    merged_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    wide = dimension.denormalize(fundamentals)
+    wide_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    narrow = dimension.attach_sectors(fundamentals)
+    narrow_seconds = time.perf_counter() - start
+
+    print(f"{len(dimension)} securities, {len(fundamentals)} fundamentals rows")
+    print(f"merge:          {merged_seconds:.4f}s  {merged.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+    print(f"denormalize:    {wide_seconds:.4f}s  {wide.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+    print(f"attach_sectors: {narrow_seconds:.4f}s  {narrow.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+    pd.testing.assert_frame_equal(merged, wide, check_dtype=False, check_categorical=False)
+    print("denormalize matches the merge")
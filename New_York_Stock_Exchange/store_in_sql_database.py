@@ -1,33 +1,259 @@
+import argparse
+import json
+import os
+import uuid
 import pandas as pd
 import sqlite3
+from csv_cache import read_table, stream_table, table_schema
+from securities_dimension import securities_dimension
 
-# Load raw data
-fundamentals = pd.read_csv("fundamentals.csv")
-securities = pd.read_csv("securities.csv")
-prices_split = pd.read_csv("prices-split-adjusted.csv")
+DB_PATH = "nyse_finance.db"
+CHUNK_SIZE = 50_000
 
-# Clean fundamentals: Rename the first column
-fundamentals = fundamentals.rename(columns={'Unnamed: 0': 'id'})
+# Primary keys double as the composite indexes used by the joins in
+# test_the_queries.py; prices is clustered on (symbol, date)
+PRIMARY_KEYS = {
+    "fundamentals": ("Ticker Symbol", "Period Ending"),
+    "securities": ("Ticker symbol",),
+    "prices": ("symbol", "date"),
+}
+WITHOUT_ROWID = {"prices"}
 
-# Clean securities: Standardize ticker symbols
-securities['Ticker symbol'] = securities['Ticker symbol'].str.upper()
+# Pragmas for bulk loading: WAL journal, relaxed fsync, big page cache
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -200000",
+]
 
-# Merge fundamentals + securities - drop the duplicate column after merge
-fundamentals_merged = pd.merge(
-    fundamentals,
-    securities,
-    left_on='Ticker Symbol',
-    right_on='Ticker symbol',
-    how='left'
-).drop(columns=['Ticker symbol'])  # Drop the duplicate column
 
-# Store in SQLite database
-conn = sqlite3.connect("nyse_finance.db")
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
 
-# Write tables to SQL
-fundamentals_merged.to_sql("fundamentals", conn, if_exists="replace", index=False)
-securities.to_sql("securities", conn, if_exists="replace", index=False)
-prices_split.to_sql("prices", conn, if_exists="replace", index=False)
 
-conn.close()
-print("Data successfully stored in SQLite database!")
\ No newline at end of file
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+# Convert a frame into plain Python columns SQLite can bind: dates become
+# ISO 'YYYY-MM-DD' text, categoricals plain strings, NaN/NaT become NULL
+def _sql_columns(df):
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            iso = series.to_numpy(dtype="datetime64[D]").astype(str)
+            values = [None if v == "NaT" else v for v in iso.tolist()]
+        elif pd.api.types.is_float_dtype(series):
+            values = series.astype("float64").tolist()
+        else:
+            values = series.astype(object).where(series.notna(), None).tolist()
+        columns.append(values)
+    return columns
+
+
+def _schema_types(df):
+    types = {}
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            types[col] = "TEXT"  # ISO-8601 date
+        else:
+            types[col] = _sql_type(df[col].dtype)
+    return types
+
+
+def create_table(conn, name, df):
+    types = _schema_types(df)
+    key = PRIMARY_KEYS.get(name)
+    definition = [f"{quote(col)} {types[col]}" + (" NOT NULL" if key and col in key else "") for col in df.columns]
+    if key:
+        definition.append("PRIMARY KEY (" + ", ".join(quote(col) for col in key) + ")")
+    suffix = " WITHOUT ROWID" if name in WITHOUT_ROWID else ""
+    conn.execute(f"DROP TABLE IF EXISTS {quote(name)}")
+    conn.execute(f"CREATE TABLE {quote(name)} (\n    " + ",\n    ".join(definition) + f"\n){suffix}")
+
+
+# With upsert=True rows whose primary key already exists are overwritten
+def insert_rows(conn, name, df, chunk_size=CHUNK_SIZE, upsert=False):
+    placeholders = ", ".join("?" for _ in df.columns)
+    columns = ", ".join(quote(col) for col in df.columns)
+    sql = f"INSERT INTO {quote(name)} ({columns}) VALUES ({placeholders})"
+    if upsert:
+        key = PRIMARY_KEYS[name]
+        updates = ", ".join(f"{quote(col)} = excluded.{quote(col)}" for col in df.columns if col not in key)
+        sql += " ON CONFLICT (" + ", ".join(quote(col) for col in key) + f") DO UPDATE SET {updates}"
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        conn.executemany(sql, zip(*_sql_columns(chunk)))
+
+
+# Replace a table with the contents of df, loaded in key order inside a
+# single transaction
+def load_table(conn, name, df, chunk_size=CHUNK_SIZE):
+    key = PRIMARY_KEYS.get(name)
+    if key:
+        df = df.sort_values(list(key), kind="stable")
+    with conn:
+        create_table(conn, name, df)
+        insert_rows(conn, name, df, chunk_size)
+
+
+# Replace a table with the rows of a stream of frames (see
+# csv_cache.stream_table). The table is created from `schema`, a zero-row
+# frame (see csv_cache.table_schema), before any chunk is read, so an empty
+# stream still leaves an empty table. Each chunk is sorted by key before
+# insertion; the whole load still runs in a single transaction.
+def load_table_chunks(conn, name, chunks, schema, chunk_size=CHUNK_SIZE):
+    key = PRIMARY_KEYS.get(name)
+    rows = 0
+    with conn:
+        create_table(conn, name, schema)
+        for chunk in chunks:
+            if key:
+                chunk = chunk.sort_values(list(key), kind="stable")
+            insert_rows(conn, name, chunk[list(schema.columns)], chunk_size)
+            rows += len(chunk)
+    return rows
+
+
+def table_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+# Most recent stored date per symbol; served from the (symbol, date) key
+def latest_price_dates(conn):
+    return dict(conn.execute("SELECT symbol, MAX(date) FROM prices GROUP BY symbol"))
+
+
+# Append only the price rows from each symbol's latest stored day onwards,
+# upserting so a corrected copy of that day replaces the stored one.
+# `prices` is a stream of frames; the stored dates are read once up front.
+# Without a prices table the stream is loaded as a new one from `schema`.
+def append_prices(conn, prices, schema, chunk_size=CHUNK_SIZE):
+    if not table_exists(conn, "prices"):
+        return load_table_chunks(conn, "prices", prices, schema, chunk_size)
+
+    stored = latest_price_dates(conn)
+    appended = 0
+    with conn:
+        for chunk in prices:
+            last_date = pd.to_datetime(chunk['symbol'].astype(str).map(stored))
+            new_rows = chunk[last_date.isna().to_numpy() | (chunk['date'] >= last_date).to_numpy()]
+            new_rows = new_rows.sort_values(list(PRIMARY_KEYS["prices"]), kind="stable")
+            insert_rows(conn, "prices", new_rows, chunk_size, upsert=True)
+            appended += len(new_rows)
+    return appended
+
+
+# Every load bumps the database generation, kept in a small file next to
+# the database so query caches can validate entries without opening it.
+# The token tells apart a rebuilt database that reaches the same count.
+def generation_path(db_path=DB_PATH):
+    return f"{db_path}-generation"
+
+
+def db_generation(db_path=DB_PATH):
+    try:
+        with open(generation_path(db_path)) as f:
+            state = json.load(f)
+        return f"{state['generation']}-{state['token']}"
+    except (OSError, ValueError, KeyError):
+        return "0"
+
+
+def bump_generation(db_path=DB_PATH):
+    try:
+        with open(generation_path(db_path)) as f:
+            generation = json.load(f)["generation"] + 1
+    except (OSError, ValueError, KeyError):
+        generation = 1
+    tmp_path = f"{generation_path(db_path)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"generation": generation, "token": uuid.uuid4().hex}, f)
+    os.replace(tmp_path, generation_path(db_path))
+    return generation
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    for pragma in LOAD_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def prepare_tables(include_prices=True):
+    # Load raw data
+    fundamentals = read_table("fundamentals")
+    # Securities with standardized (upper-case) ticker symbols
+    dimension = securities_dimension()
+
+    # Clean fundamentals: Rename the first column
+    fundamentals = fundamentals.rename(columns={'Unnamed: 0': 'id'})
+
+    # Fundamentals denormalized with the securities attributes
+    fundamentals_merged = dimension.denormalize(fundamentals)
+
+    tables = {"fundamentals": fundamentals_merged, "securities": dimension.frame()}
+    if include_prices:
+        tables["prices"] = read_table("price_split", exact=True)
+    return tables
+
+
+# Prices are streamed from the CSV, so the full price history is never held
+# in memory; they keep the CSV's float64 values (exact=True)
+def store_tables(db_path=DB_PATH, chunk_size=CHUNK_SIZE):
+    tables = prepare_tables(include_prices=False)
+    conn = connect(db_path)
+    try:
+        for name, df in tables.items():
+            load_table(conn, name, df, chunk_size)
+        load_table_chunks(conn, "prices", stream_table("price_split", exact=True),
+                          table_schema("price_split", exact=True), chunk_size)
+        # Refresh the query planner statistics for the new indexes
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+        # Tables committed before a failure still change the database
+        bump_generation(db_path)
+
+
+# Nightly refresh: the small fundamentals/securities tables are reloaded,
+# prices only receive rows newer than what is stored (from the full
+# split-adjusted file, or from a delta file with the same columns)
+def refresh_tables(db_path=DB_PATH, delta_path=None, chunk_size=CHUNK_SIZE):
+    tables = prepare_tables(include_prices=False)
+    prices = stream_table("price_split", path=delta_path, exact=True)
+    schema = table_schema("price_split", path=delta_path, exact=True)
+
+    conn = connect(db_path)
+    try:
+        for name, df in tables.items():
+            load_table(conn, name, df, chunk_size)
+        appended = append_prices(conn, prices, schema, chunk_size)
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+        bump_generation(db_path)
+    return appended
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store the NYSE tables in SQLite")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only add price rows newer than those already stored")
+    parser.add_argument("--delta", metavar="CSV",
+                        help="price rows to append (same columns as prices-split-adjusted.csv); implies --incremental")
+    args = parser.parse_args()
+
+    if args.incremental or args.delta:
+        appended = refresh_tables(delta_path=args.delta)
+        print(f"Upserted {appended:,} price rows into the SQLite database!")
+    else:
+        store_tables()
+        print("Data successfully stored in SQLite database!")
@@ -1,21 +1,27 @@
-import sqlite3
-import pandas as pd
+from query_cache import QUERY_CACHE_DIR, QueryCache
 
-conn = sqlite3.connect("nyse_finance.db")
-
-# Query 1: Apple's financials + stock price
-query_apple = """
+# Query 1: a company's financials + stock price (bind :ticker)
+query_company = """
 SELECT 
     f.[Ticker Symbol], f.[Period Ending], f.[Total Revenue], f.[Net Income], p.close as stock_price
 FROM 
     fundamentals f
 JOIN 
-    prices p ON f.[Ticker Symbol] = p.symbol AND f.[Period Ending] = p.date
+    prices p ON f.[Ticker Symbol] = p.symbol
+    -- last trading day at or before the period end, at most a week earlier
+    AND p.date = (
+        SELECT MAX(p2.date)
+        FROM prices p2
+        WHERE p2.symbol = f.[Ticker Symbol]
+          AND p2.date <= f.[Period Ending]
+          AND p2.date >= date(f.[Period Ending], '-7 days')
+    )
 WHERE 
-    f.[Ticker Symbol] = 'AAPL'
+    f.[Ticker Symbol] = :ticker
 """
-df_apple = pd.read_sql(query_apple, conn)
-print(df_apple.head())
+
+# Apple's financials + stock price
+query_apple = query_company.replace(':ticker', "'AAPL'")
 
 # Query 2: Sector-wise revenue
 query_sector = """
@@ -29,7 +35,24 @@ JOIN
 GROUP BY 
     s.[GICS Sector]
 """
-df_sector = pd.read_sql(query_sector, conn)
-print(df_sector.head())
 
-conn.close()
\ No newline at end of file
+if __name__ == "__main__":
+    import argparse
+    from duckdb_backend import BACKENDS, DEFAULT_BACKEND, read_sql_duckdb
+
+    parser = argparse.ArgumentParser(description="Run the test queries")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND)
+    args = parser.parse_args()
+
+    if args.backend == "duckdb":
+        # DuckDB reads the source tables directly
+        df_apple = read_sql_duckdb(query_apple)
+        df_sector = read_sql_duckdb(query_sector)
+    else:
+        # Results are reused from .cache/queries until the database is reloaded
+        cache = QueryCache(persist_dir=QUERY_CACHE_DIR)
+        df_apple = cache.read_sql(query_apple, db_path="nyse_finance.db")
+        df_sector = cache.read_sql(query_sector, db_path="nyse_finance.db")
+
+    print(df_apple.head())
+    print(df_sector.head())
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The scripts import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ratio_engine import RATIOS  # noqa: E402
+
+SECTORS = ['Energy', 'Financials', 'Industrials']
+
+
+# Every test runs in its own directory, so the .cache folders the engines
+# write never touch the working tree
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+# Small fundamentals frame with every column the ratio registry reads:
+# several annual periods per ticker (in shuffled row order), some zero
+# denominators and some missing values
+def make_fundamentals(n_tickers=12, n_years=4, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = sorted({col for numerator, denominator, _ in RATIOS.values()
+                      for col in [c for _, c in numerator] + [denominator]})
+    rows = []
+    for t in range(n_tickers):
+        for y in range(n_years):
+            row = {col: rng.normal(1e9, 4e8) for col in columns}
+            row.update({
+                'Ticker Symbol': f'T{t:02d}',
+                'Period Ending': pd.Timestamp(2012 + y, 12, 31) + pd.Timedelta(days=int(rng.integers(-20, 20))),
+                'GICS Sector': SECTORS[t % len(SECTORS)],
+                'GICS Sub Industry': f'Sub {t % 4}',
+                'Security': f'Company {t}',
+                'Gross Profit': rng.normal(3e8, 1e8),
+                'Net Income': rng.normal(5e7, 1e8),
+                'Earnings Before Interest and Tax': rng.normal(1e8, 2e8),
+                'Retained Earnings': rng.normal(0, 5e8),
+                'Interest Expense': rng.normal(5e7, 2e7),
+                'Net Cash Flow-Operating': rng.normal(1e8, 2e8),
+            })
+            rows.append(row)
+    df = pd.DataFrame(rows)
+    df['For Year'] = df['Period Ending'].dt.year.astype(float)
+    df.loc[[1, 7], 'Total Revenue'] = 0.0
+    df.loc[[3, 11], 'Total Equity'] = 0.0
+    df.loc[[5], 'Retained Earnings'] = np.nan
+    df.loc[[9], 'Inventory'] = np.nan
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+@pytest.fixture
+def fundamentals():
+    return make_fundamentals()
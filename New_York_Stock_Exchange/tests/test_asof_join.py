@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from asof_join import AsofIndex, asof_join
+
+
+# Unsorted price rows over business days with random gaps; tickers are a
+# categorical whose category order is not lexicographic
+def make_prices(seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range('2015-01-01', '2015-12-31')
+    frames = []
+    for ticker in ['MSFT', 'A', 'ZION', 'BRK.B', 'AA']:
+        dates = days[rng.random(len(days)) < 0.7]
+        frames.append(pd.DataFrame({'symbol': ticker, 'date': dates,
+                                    'close': rng.uniform(10, 100, len(dates))}))
+    prices = pd.concat(frames).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    prices['symbol'] = pd.Categorical(prices['symbol'], categories=['ZION', 'MSFT', 'BRK.B', 'AA', 'A'])
+    return prices
+
+
+def make_periods(seed=1):
+    rng = np.random.default_rng(seed)
+    tickers = rng.choice(['A', 'AA', 'BRK.B', 'MSFT', 'ZION', 'NOPE'], 200)
+    dates = pd.Timestamp('2014-12-15') + pd.to_timedelta(rng.integers(0, 400, 200), unit='D')
+    periods = pd.DataFrame({'Ticker Symbol': tickers, 'Period Ending': dates})
+    periods.loc[[0, 50], 'Period Ending'] = pd.NaT
+    return periods
+
+
+def reference_join(periods, prices, tolerance=None):
+    left = periods.reset_index().dropna(subset=['Period Ending']).sort_values('Period Ending')
+    right = prices.assign(symbol=prices['symbol'].astype(str)).sort_values('date')
+    merged = pd.merge_asof(left, right, left_on='Period Ending', right_on='date',
+                           left_by='Ticker Symbol', right_by='symbol', direction='backward',
+                           tolerance=None if tolerance is None else pd.Timedelta(tolerance))
+    return merged.set_index('index')['close'].reindex(periods.index)
+
+
+@pytest.mark.parametrize('tolerance', [None, '3D'])
+def test_matches_merge_asof(tolerance):
+    prices, periods = make_prices(), make_periods()
+    joined = asof_join(periods, prices, tolerance=tolerance, columns=['close'])
+    expected = reference_join(periods, prices, tolerance)
+    pd.testing.assert_series_equal(joined['close'], expected, check_names=False)
+    assert joined['close'].isna().any() and joined['close'].notna().any()
+
+
+def test_lookup_returns_price_rows():
+    prices = make_prices()
+    rows = AsofIndex(prices).lookup(['MSFT', 'NOPE', 'A'], ['2015-06-30', '2015-06-30', '2014-01-01'])
+    msft = prices[(prices['symbol'] == 'MSFT') & (prices['date'] <= '2015-06-30')]
+    assert rows[0] == msft['date'].idxmax()
+    assert list(rows[1:]) == [-1, -1]
+
+
+def test_join_keeps_left_rows_and_order():
+    prices, periods = make_prices(), make_periods()
+    joined = asof_join(periods, prices, tolerance='7D')
+    pd.testing.assert_frame_equal(joined[periods.columns], periods)
+    assert list(joined.columns) == list(periods.columns) + list(prices.columns)
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import growth_engine
+from growth_engine import compute_growth, load_growth
+
+COLUMNS = ['Total Revenue', 'Net Income', 'Inventory']
+
+
+# Rows in (ticker, period) order with the ticker groups the pandas
+# references are computed over
+def by_period(df):
+    ordered = df.sort_values(['Ticker Symbol', 'Period Ending'])
+    return ordered, ordered.groupby('Ticker Symbol')[COLUMNS]
+
+
+def test_pop_matches_groupby_pct_change(fundamentals):
+    growth = compute_growth(fundamentals, COLUMNS, kinds=('PoP',))
+    ordered, groups = by_period(fundamentals)
+    expected = groups.pct_change(fill_method=None).reindex(fundamentals.index)
+    expected.columns = [f'{c} PoP' for c in COLUMNS]
+    pd.testing.assert_frame_equal(growth, expected)
+
+
+# Annual filers: the period a year earlier is simply the previous one
+def test_yoy_matches_previous_annual_period(fundamentals):
+    growth = compute_growth(fundamentals, COLUMNS, kinds=('YoY',))
+    ordered, groups = by_period(fundamentals)
+    expected = (ordered[COLUMNS] / groups.shift(1) - 1.0).reindex(fundamentals.index)
+    expected.columns = [f'{c} YoY' for c in COLUMNS]
+    pd.testing.assert_frame_equal(growth, expected)
+
+
+# Quarterly filers compare against four periods back, not the previous one
+def test_yoy_for_quarterly_filers():
+    dates = pd.date_range('2012-03-31', periods=12, freq='QE')
+    df = pd.DataFrame({'Ticker Symbol': 'Q', 'Period Ending': dates,
+                       'Total Revenue': np.arange(100.0, 112.0)})
+    growth = compute_growth(df, ['Total Revenue'], kinds=('PoP', 'YoY'))
+    revenue = df['Total Revenue']
+    pd.testing.assert_series_equal(growth['Total Revenue YoY'], revenue.pct_change(4), check_names=False)
+    pd.testing.assert_series_equal(growth['Total Revenue PoP'], revenue.pct_change(), check_names=False)
+
+
+def test_cagr_matches_first_period(fundamentals):
+    growth = compute_growth(fundamentals, COLUMNS, kinds=('CAGR',))
+    ordered, groups = by_period(fundamentals)
+    first = groups.transform('first')
+    years = (ordered['Period Ending'] - ordered.groupby('Ticker Symbol')['Period Ending'].transform('first')).dt.days / 365.25
+    ratio = ordered[COLUMNS] / first
+    later = (years > 0).to_numpy()[:, None]
+    years = years.where(years > 0).to_numpy()[:, None]
+    expected = (ratio ** (1.0 / years) - 1.0).where((ratio > 0) & later)
+    expected = expected.reindex(fundamentals.index)
+    expected.columns = [f'{c} CAGR' for c in COLUMNS]
+    pd.testing.assert_frame_equal(growth, expected)
+
+
+def test_rows_without_period_are_left_out(fundamentals):
+    df = fundamentals.copy()
+    df.loc[df.index[0], 'Period Ending'] = pd.NaT
+    growth = compute_growth(df, COLUMNS, kinds=('PoP',))
+    assert growth.loc[df.index[0]].isna().all()
+    ordered, groups = by_period(df.drop(df.index[0]))
+    expected = groups.pct_change(fill_method=None).reindex(df.index)
+    np.testing.assert_array_equal(growth.to_numpy(), expected.to_numpy())
+
+
+def test_unknown_kind_raises(fundamentals):
+    with pytest.raises(ValueError):
+        compute_growth(fundamentals, COLUMNS, kinds=('MoM',))
+
+
+def test_load_growth_caches_and_prunes(fundamentals, tmp_path, monkeypatch):
+    monkeypatch.setattr(growth_engine, '_memo', {})
+    cache_dir = str(tmp_path / 'growth')
+    first = load_growth(fundamentals, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(first, compute_growth(fundamentals, first.columns.str.rsplit(' ', n=1).str[0].unique()))
+    assert len(os.listdir(cache_dir)) == 1
+
+    growth_engine._memo.clear()
+    pd.testing.assert_frame_equal(load_growth(fundamentals, cache_dir=cache_dir), first)
+
+    changed = fundamentals.assign(**{'Net Income': fundamentals['Net Income'] + 1e8})
+    second = load_growth(changed, cache_dir=cache_dir)
+    assert not second.equals(first)
+    assert len(os.listdir(cache_dir)) == 1
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_metrics import TRADING_DAYS, compute_price_metrics
+
+VOL_WINDOW, BETA_WINDOW, MA_WINDOWS = 5, 20, (3, 10)
+
+
+# Random-walk closes for tickers listed on different days, with a few
+# missing closes, in shuffled row order
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range('2016-01-01', periods=120)
+    frames = []
+    for i, ticker in enumerate(['MSFT', 'AAPL', 'XOM', 'GE']):
+        dates = days[i * 7:]
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        frames.append(pd.DataFrame({'symbol': ticker, 'date': dates, 'close': close}))
+    prices = pd.concat(frames, ignore_index=True)
+    prices.loc[[30, 31, 200], 'close'] = np.nan
+    return prices.sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture
+def metrics(prices):
+    return compute_price_metrics(prices, VOL_WINDOW, BETA_WINDOW, MA_WINDOWS)
+
+
+# The prices in the (symbol, date) order of the metrics frame
+@pytest.fixture
+def ordered(prices):
+    return prices.sort_values(['symbol', 'date']).reset_index(drop=True)
+
+
+def test_rows_are_sorted_by_symbol_and_date(metrics, ordered):
+    assert list(metrics['symbol'].astype(str)) == list(ordered['symbol'])
+    np.testing.assert_array_equal(metrics['date'], ordered['date'])
+    np.testing.assert_allclose(metrics['close'], ordered['close'], rtol=1e-6)
+
+
+def test_returns_match_pct_change(metrics, ordered):
+    expected = ordered.groupby('symbol')['close'].pct_change(fill_method=None)
+    np.testing.assert_allclose(metrics['Return'], expected, rtol=1e-5)
+
+
+def test_volatility_matches_rolling_std(metrics, ordered):
+    returns = ordered.groupby('symbol')['close'].pct_change(fill_method=None)
+    std = returns.groupby(ordered['symbol']).rolling(VOL_WINDOW).std().reset_index(level=0, drop=True)
+    np.testing.assert_allclose(metrics['Volatility'], std * np.sqrt(TRADING_DAYS), rtol=1e-4, atol=1e-6)
+
+
+def test_drawdown_matches_running_peak(metrics, ordered):
+    peak = ordered.groupby('symbol')['close'].cummax()
+    np.testing.assert_allclose(metrics['Drawdown'], ordered['close'] / peak - 1.0, rtol=1e-5, atol=1e-7)
+
+
+# A moving average is defined once the ticker has `window` rows and is
+# the mean of the closes in the window that are not missing
+def test_moving_averages_skip_missing_closes(metrics, ordered):
+    groups = ordered.groupby('symbol')
+    position = groups.cumcount()
+    for window in MA_WINDOWS:
+        mean = groups['close'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+        expected = mean.where(position >= window - 1)
+        np.testing.assert_allclose(metrics[f'MA_{window}'], expected, rtol=1e-5, err_msg=f'MA_{window}')
+    assert metrics['MA_3'].notna().sum() > metrics['Volatility'].notna().sum()
+
+
+# Beta against the equal-weighted mean return of all tickers on each date,
+# over windows where both returns exist on every row
+def test_beta_matches_rolling_cov_over_var(metrics, ordered):
+    returns = ordered.groupby('symbol')['close'].pct_change(fill_method=None)
+    market = returns.groupby(ordered['date']).transform('mean')
+    both = returns.notna() & market.notna()
+    r, m = returns.where(both), market.where(both)
+    frame = pd.DataFrame({'r': r, 'm': m, 'symbol': ordered['symbol']})
+    expected = frame.groupby('symbol', group_keys=False)[['r', 'm']].apply(
+        lambda g: g['r'].rolling(BETA_WINDOW).cov(g['m']) / g['m'].rolling(BETA_WINDOW).var())
+    np.testing.assert_allclose(metrics['Beta'], expected.sort_index(), rtol=1e-3, atol=1e-4)
+    assert metrics['Beta'].notna().any()
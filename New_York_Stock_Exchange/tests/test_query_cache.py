@@ -0,0 +1,111 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from query_cache import QueryCache, normalize_sql, query_key
+from store_in_sql_database import bump_generation, load_table
+
+SQL = 'SELECT symbol, SUM(close) AS total FROM prices WHERE close > ? GROUP BY symbol ORDER BY symbol'
+
+
+def make_prices(scale=1.0):
+    return pd.DataFrame({
+        'symbol': ['A', 'A', 'B', 'B', 'C'],
+        'date': pd.to_datetime(['2016-01-04', '2016-01-05', '2016-01-04', '2016-01-05', '2016-01-04']),
+        'close': [10.0 * scale, 11.0 * scale, 20.0, 21.5, 5.0],
+    })
+
+
+# Load (or reload) the prices table the way store_in_sql_database does,
+# bumping the database generation
+def store(db_path, prices):
+    conn = sqlite3.connect(db_path)
+    try:
+        load_table(conn, 'prices', prices)
+    finally:
+        conn.close()
+    bump_generation(db_path)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'nyse.db')
+    store(path, make_prices())
+    return path
+
+
+def reference(db_path, threshold=6.0):
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql(SQL, conn, params=(threshold,))
+    finally:
+        conn.close()
+
+
+def test_normalize_sql_collapses_layout_but_keeps_literals():
+    sql = """SELECT  "Ticker  Symbol", [odd  name]  -- trailing comment
+             FROM fundamentals /* block
+             comment */ WHERE name = 'a  -- b'  ;"""
+    assert normalize_sql(sql) == """SELECT "Ticker  Symbol", [odd  name] FROM fundamentals WHERE name = 'a  -- b'"""
+    assert normalize_sql("SELECT 'it''s  here'") == "SELECT 'it''s  here'"
+
+
+def test_query_key(db_path):
+    key = query_key('SELECT *  FROM prices;', db_path=db_path)
+    assert key == query_key('SELECT * -- all\nFROM prices', db_path=db_path)
+    assert key != query_key("SELECT * FROM prices WHERE symbol = 'A'", db_path=db_path)
+    assert query_key(SQL, (1,), db_path) != query_key(SQL, (2,), db_path)
+    assert query_key(SQL, {'a': 1, 'b': 2}, db_path) == query_key(SQL, {'b': 2, 'a': 1}, db_path)
+    assert key != query_key('SELECT * FROM prices', db_path=db_path, generation='other')
+
+
+def test_hit_returns_the_same_frame(db_path):
+    cache = QueryCache()
+    first = cache.read_sql(SQL, (6.0,), db_path)
+    pd.testing.assert_frame_equal(first, reference(db_path))
+    first['total'] = 0.0
+
+    second = cache.read_sql(' '.join(SQL.split('  ')) + ';', (6.0,), db_path)
+    pd.testing.assert_frame_equal(second, reference(db_path))
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    pd.testing.assert_frame_equal(cache.read_sql(SQL, (15.0,), db_path), reference(db_path, 15.0))
+    assert cache.stats()['misses'] == 2
+
+
+def test_reload_invalidates(db_path):
+    cache = QueryCache()
+    before = cache.read_sql(SQL, (6.0,), db_path)
+    store(db_path, make_prices(scale=2.0))
+    after = cache.read_sql(SQL, (6.0,), db_path)
+    pd.testing.assert_frame_equal(after, reference(db_path))
+    assert not after.equals(before)
+    assert cache.stats()['entries'] == 1
+
+
+def test_persisted_results_are_shared_and_pruned(db_path, tmp_path):
+    persist_dir = str(tmp_path / 'queries')
+    QueryCache(persist_dir=persist_dir).read_sql(SQL, (6.0,), db_path)
+
+    other = QueryCache(persist_dir=persist_dir)
+    pd.testing.assert_frame_equal(other.read_sql(SQL, (6.0,), db_path), reference(db_path))
+    assert other.stats()['hits'] == 1
+
+    store(db_path, make_prices(scale=2.0))
+    pd.testing.assert_frame_equal(other.read_sql(SQL, (6.0,), db_path), reference(db_path))
+    assert len(os.listdir(persist_dir)) == 1
+
+
+# Thresholds below every close give equally sized results
+def test_least_recently_used_entries_are_evicted(db_path):
+    probe = QueryCache()
+    probe.read_sql(SQL, (1.0,), db_path)
+    cache = QueryCache(max_bytes=int(probe.bytes * 2.5))
+    for threshold in (1.0, 2.0, 1.0, 3.0):
+        cache.read_sql(SQL, (threshold,), db_path)
+    assert cache.stats() == {'entries': 2, 'bytes': 2 * probe.bytes, 'hits': 1, 'misses': 3}
+    cache.read_sql(SQL, (1.0,), db_path)
+    cache.read_sql(SQL, (2.0,), db_path)
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 4
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ratio_engine import COMPOSITES, RATIOS, add_ratios, compute_ratios, safe_divide
+
+
+# The textbook formula for every registered ratio, written out in pandas
+def reference_ratios(df):
+    ratio = lambda a, b: (a / b).replace([np.inf, -np.inf], np.nan)
+    ref = pd.DataFrame(index=df.index)
+    ref['Net Margin'] = ratio(df['Net Income'], df['Total Revenue'])
+    ref['Gross Margin'] = ratio(df['Total Revenue'] - df['Cost of Revenue'], df['Total Revenue'])
+    ref['Gross Profit Margin'] = ratio(df['Gross Profit'], df['Total Revenue'])
+    ref['Operating Margin'] = ratio(df['Operating Income'], df['Total Revenue'])
+    ref['ROE'] = ratio(df['Net Income'], df['Total Equity'])
+    ref['Current Ratio'] = ratio(df['Total Current Assets'], df['Total Current Liabilities'])
+    ref['Quick Ratio'] = ratio(df['Total Current Assets'] - df['Inventory'], df['Total Current Liabilities'])
+    ref['Debt-to-Equity'] = ratio(df['Long-Term Debt'], df['Total Equity'])
+    ref['Liabilities-to-Equity'] = ratio(df['Total Liabilities'], df['Total Equity'])
+    ref['Debt Ratio'] = ratio(df['Total Liabilities'], df['Total Assets'])
+    ref['Interest Coverage'] = ratio(df['Earnings Before Interest and Tax'], df['Interest Expense'])
+    ref['Asset Turnover'] = ratio(df['Total Revenue'], df['Total Assets'])
+    ref['Inventory Turnover'] = ratio(df['Cost of Revenue'], df['Inventory'])
+    ref['Working Capital to Assets'] = ratio(df['Total Current Assets'] - df['Total Current Liabilities'], df['Total Assets'])
+    ref['Retained Earnings to Assets'] = ratio(df['Retained Earnings'].fillna(0), df['Total Assets'])
+    ref['EBIT to Assets'] = ratio(df['Earnings Before Interest and Tax'], df['Total Assets'])
+    ref['Equity to Liabilities'] = ratio(df['Total Equity'], df['Total Liabilities'])
+    ref['Altman_Z'] = (1.2 * ref['Working Capital to Assets'] + 1.4 * ref['Retained Earnings to Assets']
+                       + 3.3 * ref['EBIT to Assets'] + 0.6 * ref['Equity to Liabilities']
+                       + ref['Asset Turnover'])
+    return ref
+
+
+def test_every_ratio_matches_pandas(fundamentals):
+    ratios = compute_ratios(fundamentals)
+    ref = reference_ratios(fundamentals)
+    assert list(ratios.columns) == list(RATIOS) + list(COMPOSITES)
+    pd.testing.assert_frame_equal(ratios, ref[ratios.columns].astype(np.float32), rtol=1e-5)
+
+
+def test_zero_denominator_is_nan_not_inf(fundamentals):
+    ratios = compute_ratios(fundamentals, ['Net Margin', 'ROE'])
+    assert not np.isinf(ratios.to_numpy()).any()
+    assert ratios.loc[fundamentals['Total Revenue'] == 0, 'Net Margin'].isna().all()
+    assert ratios.loc[fundamentals['Total Equity'] == 0, 'ROE'].isna().all()
+
+
+# Banks and card issuers report Gross Profit as 0; Gross Margin must still
+# come from revenue and cost of revenue
+def test_gross_margin_ignores_reported_gross_profit(fundamentals):
+    df = fundamentals.copy()
+    df.loc[df.index[:5], 'Gross Profit'] = 0.0
+    ratios = compute_ratios(df, ['Gross Margin', 'Gross Profit Margin'])
+    expected = ((df['Total Revenue'] - df['Cost of Revenue']) / df['Total Revenue']).replace([np.inf, -np.inf], np.nan)
+    np.testing.assert_allclose(ratios['Gross Margin'], expected, rtol=1e-5)
+    assert (ratios.loc[df.index[:5], 'Gross Profit Margin'].dropna() == 0).all()
+
+
+def test_keep_existing_takes_the_reported_column(fundamentals):
+    df = fundamentals.assign(**{'Current Ratio': 123.0})
+    ratios = compute_ratios(df, ['Current Ratio', 'Net Margin'], keep_existing=True)
+    assert (ratios['Current Ratio'] == 123.0).all()
+    assert list(ratios.columns) == ['Current Ratio', 'Net Margin']
+
+
+def test_add_ratios_renames_and_keeps_existing_columns(fundamentals):
+    df = fundamentals.assign(**{'Current Ratio': 123.0})
+    out = add_ratios(df, ['Current Ratio', 'Debt-to-Equity'], rename={'Debt-to-Equity': 'D/E'})
+    assert (out['Current Ratio'] == 123.0).all()
+    expected = (df['Long-Term Debt'] / df['Total Equity']).replace([np.inf, -np.inf], np.nan)
+    np.testing.assert_allclose(out['D/E'], expected, rtol=1e-5)
+    assert 'D/E' not in fundamentals.columns
+
+    out = add_ratios(df, ['Current Ratio'], overwrite=True)
+    np.testing.assert_allclose(out['Current Ratio'], df['Total Current Assets'] / df['Total Current Liabilities'], rtol=1e-5)
+
+
+def test_unknown_ratio_raises(fundamentals):
+    with pytest.raises(KeyError):
+        compute_ratios(fundamentals, ['No Such Ratio'])
+
+
+def test_safe_divide():
+    np.testing.assert_array_equal(safe_divide([1.0, 2.0, 0.0], [2.0, 0.0, 0.0]), [0.5, np.nan, np.nan])
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_screen import CASH_FLOW_ISSUE, DEBT_RISK, FLAGS, INVENTORY_RISK, Flag, RiskScreen
+
+
+# 45 rows, so the packed bitmaps end on a partial byte
+@pytest.fixture
+def df(fundamentals):
+    return fundamentals.iloc[:45]
+
+
+# Each flag's metric written out in pandas
+def reference_metrics(df):
+    ratio = lambda a, b: (a / b).replace([np.inf, -np.inf], np.nan)
+    assets = df['Total Assets']
+    pop = df.sort_values(['Ticker Symbol', 'Period Ending']).groupby('Ticker Symbol')[['Total Revenue', 'Inventory']]
+    growth = pop.pct_change(fill_method=None).reindex(df.index)
+    return pd.DataFrame({
+        'Altman_Z': (1.2 * ratio(df['Total Current Assets'] - df['Total Current Liabilities'], assets)
+                     + 1.4 * ratio(df['Retained Earnings'].fillna(0), assets)
+                     + 3.3 * ratio(df['Earnings Before Interest and Tax'], assets)
+                     + 0.6 * ratio(df['Total Equity'], df['Total Liabilities'])
+                     + ratio(df['Total Revenue'], assets)),
+        'Debt-to-Equity': ratio(df['Long-Term Debt'], df['Total Equity']),
+        'Interest Coverage': ratio(df['Earnings Before Interest and Tax'], df['Interest Expense']),
+        'Inventory Growth': growth['Inventory'],
+        'Revenue Growth': growth['Total Revenue'],
+        'Net Income': df['Net Income'],
+        'Net Cash Flow-Operating': df['Net Cash Flow-Operating'],
+    })
+
+
+# Direct boolean filter for each flag; NaN compares False
+def reference_masks(df):
+    metrics = reference_metrics(df)
+    return pd.DataFrame({
+        'altman_distress': metrics['Altman_Z'] < 1.8,
+        'high_leverage': metrics['Debt-to-Equity'] > 2,
+        'low_interest_coverage': metrics['Interest Coverage'] < 2,
+        'inventory_buildup': metrics['Inventory Growth'] > 0.3,
+        'weak_revenue_growth': metrics['Revenue Growth'] < 0.1,
+        'profitable': metrics['Net Income'] > 0,
+        'negative_operating_cash_flow': metrics['Net Cash Flow-Operating'] < 0,
+    })
+
+
+def test_every_flag_matches_a_pandas_filter(df):
+    screen = RiskScreen(df)
+    ref = reference_masks(df)
+    assert set(FLAGS) == set(ref.columns)
+    for name in FLAGS:
+        np.testing.assert_array_equal(screen.mask(name), ref[name].to_numpy(), err_msg=name)
+    pd.testing.assert_series_equal(screen.summary(), ref.sum()[list(FLAGS)], check_names=False)
+
+
+def test_risk_groups_match_combined_filters(df):
+    screen = RiskScreen(df)
+    ref = reference_masks(df)
+    np.testing.assert_array_equal(screen.mask(DEBT_RISK), ref['high_leverage'] | ref['low_interest_coverage'])
+    np.testing.assert_array_equal(screen.mask(INVENTORY_RISK), ref['inventory_buildup'] & ref['weak_revenue_growth'])
+    np.testing.assert_array_equal(screen.mask(CASH_FLOW_ISSUE), ref['profitable'] & ref['negative_operating_cash_flow'])
+    np.testing.assert_array_equal(screen.mask(~Flag('profitable')), ~ref['profitable'])
+    assert screen.count(CASH_FLOW_ISSUE) == (ref['profitable'] & ref['negative_operating_cash_flow']).sum()
+
+
+def test_threshold_override(df):
+    screen = RiskScreen(df)
+    metrics = reference_metrics(df)
+    np.testing.assert_array_equal(screen.mask(Flag('high_leverage', 1.0)), metrics['Debt-to-Equity'] > 1.0)
+    np.testing.assert_array_equal(screen.mask(Flag('altman_distress', 3) & ~Flag('high_leverage')),
+                                  (metrics['Altman_Z'] < 3) & ~(metrics['Debt-to-Equity'] > 2))
+
+
+def test_view_returns_matching_rows_with_metrics(df):
+    screen = RiskScreen(df)
+    ref = reference_masks(df)
+    metrics = reference_metrics(df)
+    view = screen.view('altman_distress', ['Ticker Symbol', 'Altman_Z'])
+    expected = df.loc[ref['altman_distress'], ['Ticker Symbol']]
+    pd.testing.assert_frame_equal(view[['Ticker Symbol']], expected)
+    np.testing.assert_allclose(view['Altman_Z'], metrics.loc[expected.index, 'Altman_Z'], rtol=1e-5)
+    pd.testing.assert_frame_equal(screen.view(DEBT_RISK), df[(ref['high_leverage'] | ref['low_interest_coverage']).to_numpy()])
+
+
+def test_unknown_flag_raises():
+    with pytest.raises(KeyError):
+        Flag('no_such_flag')
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_fundamentals
+from ratio_engine import compute_ratios
+from sector_cube import DIMENSIONS, SKETCH_ACCURACY, SectorCube, load_or_build
+
+METRICS = ['Net Margin', 'ROE', 'Altman_Z', 'Total Revenue']
+
+
+# One row per (row, metric) finite value, with the fiscal year from 'For Year'
+def reference_long(df):
+    wide = pd.concat([compute_ratios(df, METRICS[:3]).astype(np.float64), df[['Total Revenue']]], axis=1)
+    wide = wide.assign(**{'GICS Sector': df['GICS Sector'], 'GICS Sub Industry': df['GICS Sub Industry'],
+                          'Fiscal Year': df['For Year'].astype(np.int32)})
+    long = wide.melt(id_vars=DIMENSIONS, var_name='Metric', value_name='Value')
+    return long[np.isfinite(long['Value'])]
+
+
+def reference_rollup(df, by):
+    result = reference_long(df).groupby(by + ['Metric'])['Value'].agg(['sum', 'count', 'min', 'max'])
+    result['mean'] = result['sum'] / result['count']
+    return result
+
+
+def assert_rollups_equal(left, right):
+    pd.testing.assert_frame_equal(left.sort_index(), right.sort_index(), check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize('by', [['GICS Sector'], ['GICS Sector', 'Fiscal Year'], DIMENSIONS])
+def test_rollup_matches_groupby(fundamentals, by):
+    cube = SectorCube(METRICS)
+    cube.update(fundamentals)
+    rollup = cube.rollup(by, quantiles=())
+    assert_rollups_equal(rollup, reference_rollup(fundamentals, by))
+
+
+# The sketch returns a value within the sketch accuracy of the order
+# statistic at rank floor(q * (n - 1))
+def test_quantiles_within_sketch_accuracy(fundamentals):
+    cube = SectorCube(METRICS)
+    cube.update(fundamentals)
+    rollup = cube.rollup(['GICS Sector'], quantiles=(0.25, 0.5, 0.9))
+    for (sector, metric), values in reference_long(fundamentals).groupby(['GICS Sector', 'Metric'])['Value']:
+        ordered = np.sort(values.to_numpy())
+        for q in (0.25, 0.5, 0.9):
+            exact = ordered[int(np.floor(q * (len(ordered) - 1)))]
+            approx = rollup.loc[(sector, metric), f'q{int(round(q * 100))}']
+            assert abs(approx - exact) <= SKETCH_ACCURACY * abs(exact) + 1e-12, (sector, metric, q)
+
+
+def test_batches_fold_into_the_same_cube(fundamentals):
+    cube = SectorCube(METRICS)
+    assert cube.update(fundamentals.iloc[:20]) == 20
+    assert cube.update(fundamentals.iloc[10:]) == 28
+    assert cube.update(fundamentals) == 0
+    assert_rollups_equal(cube.rollup(DIMENSIONS, quantiles=()), reference_rollup(fundamentals, DIMENSIONS))
+
+
+# Restated, moved, removed and new rows: the synced cube equals a cube
+# built from scratch on the new source
+def test_sync_matches_a_fresh_build(fundamentals):
+    cube = SectorCube(METRICS)
+    cube.update(fundamentals)
+
+    source = fundamentals.copy()
+    source.loc[source.index[:5], 'Net Income'] *= 3
+    source.loc[source.index[5], 'GICS Sector'] = 'Utilities'
+    source = source.drop(source.index[6:10])
+    extra = make_fundamentals(n_tickers=3, seed=7).assign(**{'Ticker Symbol': lambda d: 'NEW' + d['Ticker Symbol']})
+    source = pd.concat([source, extra], ignore_index=True)
+
+    assert cube.sync(source) == (6 + len(extra), 4)
+    fresh = SectorCube(METRICS)
+    fresh.update(source)
+    for by in (['GICS Sector'], DIMENSIONS):
+        assert_rollups_equal(cube.rollup(by), fresh.rollup(by))
+        assert_rollups_equal(cube.rollup(by, quantiles=()), reference_rollup(source, by))
+    pd.testing.assert_series_equal(cube.sketch, fresh.sketch)
+
+
+def test_remove_rebuilds_cells(fundamentals):
+    cube = SectorCube(METRICS)
+    cube.update(fundamentals)
+    row = fundamentals.iloc[0]
+    key = f"{row['Ticker Symbol']}|{row['Period Ending'].date()}"
+    assert cube.remove([key, 'NOPE|2000-01-01']) == 1
+    assert_rollups_equal(cube.rollup(DIMENSIONS, quantiles=()), reference_rollup(fundamentals.iloc[1:], DIMENSIONS))
+
+
+def test_save_load_and_load_or_build(fundamentals, tmp_path):
+    path = str(tmp_path / 'cube.pkl')
+    cube = load_or_build(fundamentals, path=path)
+    loaded = SectorCube.load(path)
+    assert loaded.seen == cube.seen
+    assert_rollups_equal(loaded.rollup(), cube.rollup())
+
+    smaller = fundamentals.iloc[4:]
+    synced = load_or_build(smaller, path=path)
+    assert len(synced.seen) == len(smaller)
+    fresh = SectorCube()
+    fresh.update(smaller)
+    assert_rollups_equal(synced.rollup(DIMENSIONS), fresh.rollup(DIMENSIONS))
+
+
+def test_empty_cube_raises():
+    with pytest.raises(ValueError):
+        SectorCube(METRICS).rollup()
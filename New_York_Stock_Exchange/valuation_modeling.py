@@ -1,30 +1,33 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from csv_cache import read_table
+from monte_carlo_valuation import base_cash_flows, simulate_valuations
 
-# Project free cash flows (simplified)
-projected_cash_flows = [25000, 30000, 35000, 40000]  # Example projections
-discount_rate = 0.10  # 10% discount rate
+if __name__ == "__main__":
+    # Monte Carlo DCF for every company: latest free cash flow projected over
+    # 5 periods with simulated growth and discount rates
+    fundamentals = read_table("fundamentals", columns=[
+        'Ticker Symbol', 'Period Ending', 'Net Cash Flow-Operating',
+        'Capital Expenditures', 'Estimated Shares Outstanding'])
+    valuation = simulate_valuations(base_cash_flows(fundamentals))
+    valuation.to_csv('dcf_valuation.csv')
+    dcf_value = valuation.loc['AAPL', 'P50']
 
-# Calculate present value
-dcf_value = sum(
-    cf / (1 + discount_rate) ** (i+1) 
-    for i, cf in enumerate(projected_cash_flows)
-)
 
+    # adding revenue data from AAPl_full_forecasts.csv
+    aapl_forecast = pd.read_csv('AAPl_full_forecasts.csv')
+    aapl_revenue = aapl_forecast['Cost of Revenue'].dropna().values
 
-# adding revenue data from AAPl_full_forecasts.csv
-aapl_forecast = pd.read_csv('AAPl_full_forecasts.csv')
-aapl_revenue = aapl_forecast['Cost of Revenue'].dropna().values
+    # Simulate revenue with uncertainty
+    n_simulations = 1000
+    rev_mean = aapl_revenue.mean()
+    rev_std = aapl_revenue.std()
 
-# Simulate revenue with uncertainty
-n_simulations = 1000
-rev_mean = aapl_revenue.mean()
-rev_std = aapl_revenue.std()
+    simulated_rev = np.random.normal(rev_mean, rev_std, n_simulations)
+    prob_above_target = np.mean(simulated_rev > 600000)  # P(Revenue > $600k)
 
-simulated_rev = np.random.normal(rev_mean, rev_std, n_simulations)
-prob_above_target = np.mean(simulated_rev > 600000)  # P(Revenue > $600k)
-
-# Display results
-print(f"Discounted Cash Flow Value: ${dcf_value:,.2f}")
-print(f"Probability of Revenue > $600k: {prob_above_target:.2%}")
\ No newline at end of file
+    # Display results
+    print(f"Median Discounted Cash Flow Value (AAPL): ${dcf_value:,.2f}")
+    print("DCF value percentiles for all companies saved to 'dcf_valuation.csv'")
+    print(f"Probability of Revenue > $600k: {prob_above_target:.2%}")